@@ -3,14 +3,25 @@ from __future__ import annotations
 
 
 
+import datetime
+import hashlib
+import io
+import itertools
+import json
+import zipfile
+from pathlib import Path
+from urllib.parse import quote
 from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import numpy as np
+import openpyxl
 import pandas as pd
 import plotly.graph_objects as go
 import streamlit as st
 
+from product_names import ProductNameIndex, base_product_name
+
 # ===================== 설정/상수 =====================
 DATE_COL = "날짜"
 KW_COL = "키워드"
@@ -23,9 +34,49 @@ ORD_COL = "총 주문수(14일)"
 REV_COL = "총 전환매출액(14일)"
 REQUIRED_COLS = [DATE_COL, KW_COL, SURF_COL, IMP_COL, CLK_COL, COST_COL, ORD_COL, REV_COL]
 
+# 광고 리포트 이력 저장소(로컬 Parquet, month=YYYY-MM/product=<상품>/ 파티션)
+AD_HISTORY_DIR = "ad_history"
+HIST_KEY_COLS = ["date", "keyword", "surface", "product"]
+HIST_METRIC_COLS = ["impressions", "clicks", "cost", "orders_14d", "revenue_14d"]
+
+# 시나리오 시뮬레이션: 입찰 변경 시 클릭(→주문/매출) 탄력성. 클릭 ∝ (1+입찰%)^e, CPC ∝ (1+입찰%)
+SIM_CLICK_ELASTICITY = 0.5
+
+# 부트스트랩(Poisson 가중 재표본): 반복 수, 시드, 신뢰구간, 배치당 (일별 행 × 반복) 셀 상한
+BOOT_RESAMPLES = 200
+BOOT_SEED = 42
+BOOT_CI = 0.90
+BOOT_CELL_BUDGET = 8_000_000
+
+# 대용량 모드: 청크당 행 수
+STREAM_CHUNK_ROWS = 200_000
+
+# 키워드 추세: 롤링 윈도우(일) / 단기 vs 장기 비교
+TREND_WINDOWS = (7, 14, 28)
+
+# 누적곡선: 이 점 수를 넘으면 WebGL(Scattergl) + LTTB 다운샘플
+CURVE_WEBGL_THRESHOLD = 5000
+CURVE_MAX_POINTS = 2000
+# 차트 Figure 캐시(세션당 보관 개수)
+FIG_CACHE_MAX = 16
+
 # ===================== 유틸 =====================
-def _to_int(s: pd.Series) -> pd.Series:
-    return pd.to_numeric(s, errors="coerce").fillna(0).round(0).astype(int)
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+# Poisson(1) 역CDF를 1/65536 간격으로 양자화한 표(부트스트랩 가중치용)
+_POISSON1_TABLE = np.searchsorted(
+    np.cumsum(np.exp(-1.0) / np.cumprod(np.r_[1.0, np.arange(1, 20, dtype=float)])),
+    (np.arange(65536) + 0.5) / 65536,
+).astype(np.uint8)
+
+def _to_int(s: pd.Series, dtype: Any = int) -> pd.Series:
+    return pd.to_numeric(s, errors="coerce").fillna(0).round(0).astype(dtype)
+
+def _to_category(s: pd.Series, transform) -> pd.Categorical:
+    """문자열 변환을 행마다가 아니라 고유값에만 적용한 뒤 카테고리 코드로 되돌린다."""
+    codes, uniques = pd.factorize(s, use_na_sentinel=False)
+    mapped = transform(pd.Series(uniques, dtype=object))
+    codes2, cats = pd.factorize(mapped)
+    return pd.Categorical.from_codes(codes2[codes], categories=cats)
 
 def _to_date(s: pd.Series) -> pd.Series:
     txt = s.astype(str).str.strip()
@@ -52,32 +103,40 @@ def _moving_average(y: np.ndarray, window: int) -> np.ndarray:
     return np.convolve(ypad, kernel, mode="valid")
 
 def _longest_true_run_by_x(mask: np.ndarray, x: np.ndarray) -> tuple[int, int]:
-    best_span, best_s, cur_s = 0.0, -1, -1
-    for i, v in enumerate(mask):
-        if v and cur_s == -1:
-            cur_s = i
-        if (not v or i == len(mask) - 1) and cur_s != -1:
-            e = i if not v else i
-            span = float(x[e] - x[cur_s])
-            if span > best_span:
-                best_span, best_s = span, cur_s
-            cur_s = -1
-    if best_s == -1:
+    """
+    x 폭이 가장 긴 True 구간의 (시작, 끝) 인덱스. 없으면 (-1, -1).
+    - 구간 폭: 다음 False 지점(배열 끝이면 마지막 점)의 x - 시작 x
+    - 폭 동률이면 앞 구간 우선, 폭 0 이하는 무시
+    """
+    m = np.asarray(mask, dtype=bool)
+    n = m.size
+    if n == 0:
+        return -1, -1
+    edges = np.diff(np.concatenate(([False], m, [False])).astype(np.int8))
+    starts = np.flatnonzero(edges == 1)
+    stops = np.flatnonzero(edges == -1)  # exclusive
+    if starts.size == 0:
+        return -1, -1
+    xf = np.asarray(x, dtype=float)
+    spans = xf[np.minimum(stops, n - 1)] - xf[starts]
+    spans = np.where(np.isnan(spans), -np.inf, spans)
+    best = int(np.argmax(spans))
+    if not spans[best] > 0:
         return -1, -1
-    e = best_s
-    while e + 1 < len(mask) and mask[e + 1]:
-        e += 1
-    return best_s, e
+    return int(starts[best]), int(stops[best] - 1)
 
 def _quantile_x(x: np.ndarray, q: float) -> float:
     return float(np.quantile(x, float(np.clip(q, 0.0, 1.0))))
 
+def _is_load_col(c: Any) -> bool:
+    return c in REQUIRED_COLS or c == PROD_COL
+
 def _load_df(upload) -> pd.DataFrame:
     try:
         if upload.name.lower().endswith(".csv"):
-            df = pd.read_csv(upload)
+            df = pd.read_csv(upload, usecols=_is_load_col)
         else:
-            df = pd.read_excel(upload)
+            df = pd.read_excel(upload, usecols=_is_load_col)
     except Exception as e:
         raise ValueError(f"파일 로드 실패: {e}")
     missing = [c for c in REQUIRED_COLS if c not in df.columns]
@@ -87,24 +146,121 @@ def _load_df(upload) -> pd.DataFrame:
 
 PROD_COL = "광고집행 상품명"
 
-def _normalize(df_raw: pd.DataFrame) -> pd.DataFrame:
-    df = df_raw.copy()
-    df["date"] = _to_date(df[DATE_COL])
-    df = df[df["date"].notna()].copy()
+def _normalize(df_raw: pd.DataFrame, product_index: ProductNameIndex | None = None) -> pd.DataFrame:
+    """
+    필요한 컬럼만 새 프레임으로 만든다(원본 한글 컬럼은 포함하지 않음).
+    keyword/surface/product는 category, 지표는 int32(횟수)/int64(금액).
+    product_index가 있으면 상품명을 products.product_name으로 맞춘다(미매칭은 대표 상품명 유지).
+    """
+    # 날짜 파싱도 고유값에만 적용(같은 date 객체를 행들이 공유)
+    d_codes, d_uniques = pd.factorize(df_raw[DATE_COL], use_na_sentinel=False)
+    date = _to_date(pd.Series(d_uniques, dtype=object)).to_numpy(dtype=object)[d_codes]
+    keep = pd.notna(date)
+    src = df_raw.loc[keep]
     # 대표 상품명: 쉼표 앞 첫 번째 값
-    if PROD_COL in df.columns:
-        df["product"] = df[PROD_COL].astype(str).str.split(",").str[0].str.strip()
+    if PROD_COL in src.columns:
+        if product_index is None:
+            product = _to_category(src[PROD_COL], lambda u: u.map(base_product_name))
+        else:
+            product = _to_category(src[PROD_COL], lambda u: pd.Series(product_index.canonical_names(u), dtype=object))
     else:
-        df["product"] = "알 수 없음"
-    # ASCII 콤마 제거(줄바꿈 분리와 충돌 방지)
-    df["keyword"] = df[KW_COL].astype(str).str.replace(",", "", regex=False)
-    df["surface"] = df[SURF_COL].astype(str).fillna("").str.strip()
-    df["impressions"] = _to_int(df[IMP_COL])
-    df["clicks"] = _to_int(df[CLK_COL])
-    df["cost"] = _to_int(df[COST_COL])
-    df["orders_14d"] = _to_int(df[ORD_COL])
-    df["revenue_14d"] = _to_int(df[REV_COL])
-    return df
+        product = pd.Categorical(["알 수 없음"] * int(keep.sum()))
+    return pd.DataFrame({
+        "date": date[keep],
+        "product": product,
+        # ASCII 콤마 제거(줄바꿈 분리와 충돌 방지)
+        "keyword": _to_category(src[KW_COL], lambda u: u.astype(str).str.replace(",", "", regex=False)),
+        "surface": _to_category(src[SURF_COL], lambda u: u.astype(str).fillna("").str.strip()),
+        "impressions": _to_int(src[IMP_COL], np.int32).to_numpy(),
+        "clicks": _to_int(src[CLK_COL], np.int32).to_numpy(),
+        "cost": _to_int(src[COST_COL], np.int64).to_numpy(),
+        "orders_14d": _to_int(src[ORD_COL], np.int32).to_numpy(),
+        "revenue_14d": _to_int(src[REV_COL], np.int64).to_numpy(),
+    })
+
+# ===================== 이력 저장소 =====================
+def _history_manifest(root: str | Path = AD_HISTORY_DIR) -> Dict[str, Dict[str, Any]]:
+    path = Path(root) / "_manifest.json"
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _history_ingest(df: pd.DataFrame, content: bytes, name: str, root: str | Path = AD_HISTORY_DIR) -> int:
+    """
+    정규화된 리포트를 append-only로 저장. 같은 파일(sha256)은 한 번만 적재.
+    - 한 리포트 안에서 같은 키(날짜·키워드·지면·상품) 행은 지표를 합산(캠페인/옵션별 행, 비검색 '-' 행)
+    - 파티션마다 새 part 파일을 추가하고, 조회 시 (날짜, 상품)마다 가장 최근 적재분만 사용
+    반환: 적재한 행 수(합산 후, 이미 적재된 파일이면 0)
+    """
+    root = Path(root)
+    digest = hashlib.sha256(content).hexdigest()
+    manifest = _history_manifest(root)
+    if digest in manifest or df.empty:
+        return 0
+
+    part = (
+        df[HIST_KEY_COLS + HIST_METRIC_COLS]
+        .groupby(HIST_KEY_COLS, sort=False, observed=True)[HIST_METRIC_COLS]
+        .sum()
+        .reset_index()
+    )
+    month = pd.to_datetime(part["date"]).dt.strftime("%Y-%m")
+    stamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S%f")
+    for (m, prod), g in part.groupby([month, part["product"]], sort=False, observed=True):
+        pdir = root / f"month={m}" / f"product={quote(str(prod), safe='')}"
+        pdir.mkdir(parents=True, exist_ok=True)
+        g.to_parquet(pdir / f"{stamp}-{digest[:12]}.parquet", index=False)
+
+    manifest[digest] = {
+        "name": name,
+        "rows": int(len(part)),
+        "date_min": str(part["date"].min()),
+        "date_max": str(part["date"].max()),
+        "ingested_at": stamp,
+    }
+    with open(root / "_manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    return int(len(part))
+
+def _history_bounds(root: str | Path = AD_HISTORY_DIR) -> Tuple[datetime.date, datetime.date] | None:
+    manifest = _history_manifest(root)
+    if not manifest:
+        return None
+    lo = min(datetime.date.fromisoformat(v["date_min"]) for v in manifest.values())
+    hi = max(datetime.date.fromisoformat(v["date_max"]) for v in manifest.values())
+    return lo, hi
+
+def _history_load(
+    date_from: datetime.date,
+    date_to: datetime.date,
+    product: str | None = None,
+    root: str | Path = AD_HISTORY_DIR,
+) -> pd.DataFrame:
+    """
+    기간에 걸친 월 파티션만 읽어 _normalize와 같은 컬럼 구성으로 반환.
+    같은 (날짜, 상품)이 여러 번 적재됐으면 가장 최근 적재분이 그 날짜·상품 범위를 통째로 대체
+    (적재 한 번 안에서는 키가 이미 합산돼 유일).
+    """
+    root = Path(root)
+    files: List[Path] = []
+    for m in pd.period_range(date_from, date_to, freq="M").strftime("%Y-%m"):
+        mdir = root / f"month={m}"
+        if not mdir.is_dir():
+            continue
+        pattern = f"product={quote(product, safe='')}/*.parquet" if product else "product=*/*.parquet"
+        files.extend(mdir.glob(pattern))
+    if not files:
+        return pd.DataFrame(columns=HIST_KEY_COLS + HIST_METRIC_COLS)
+
+    files.sort(key=lambda f: f.name)  # 파일명 앞부분 = 적재 시각
+    parts = [pd.read_parquet(f) for f in files]
+    df = pd.concat(parts, ignore_index=True)
+    ingest = np.repeat(np.arange(len(parts)), [len(p) for p in parts])
+    keep = ((df["date"] >= date_from) & (df["date"] <= date_to)).to_numpy()
+    df, ingest = df[keep], ingest[keep]
+    latest = pd.Series(ingest, index=df.index).groupby([df["date"], df["product"]], sort=False, observed=True).transform("max")
+    return df[ingest == latest.to_numpy()].reset_index(drop=True)
 
 # ===================== 집계/지표 =====================
 def _aggregate_kw(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, int]]:
@@ -117,21 +273,188 @@ def _aggregate_kw(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, int]]:
         "total_orders": int(df["orders_14d"].sum()),
         "date_min": date_min,
         "date_max": date_max,
+        "by_surface": _surface_breakdown(df),
     }
-    df_imp_pos = df[df["impressions"] > 0]
-    days = df_imp_pos.groupby("keyword")["date"].nunique().reset_index(name="active_days")
-    kw = (
-        df.groupby(["keyword", "surface"], as_index=False)[
-            ["impressions", "clicks", "cost", "orders_14d", "revenue_14d"]
-        ]
-        .sum()
-        .merge(days, on="keyword", how="left")
-    )
-    kw["active_days"] = kw["active_days"].fillna(0).astype(int)
+    kw = df.groupby(["keyword", "surface"], as_index=False, observed=True)[
+        ["impressions", "clicks", "cost", "orders_14d", "revenue_14d"]
+    ].sum()
+    # active_days: 노출 > 0 인 행으로 키워드별 일자 비트맵을 켜고 비트 수를 센다(필터 프레임/merge 없음)
+    kw_codes, kw_uniques = pd.factorize(df["keyword"])
+    d_codes, _ = pd.factorize(df["date"])
+    imp_pos = df["impressions"].to_numpy() > 0
+    active = np.zeros(len(kw_uniques), dtype=np.int64)
+    if imp_pos.any():
+        bits, _ = _bitset_set(np.zeros((len(kw_uniques), 1), dtype=np.uint8), 0, kw_codes[imp_pos], d_codes[imp_pos])
+        active = _POPCOUNT8[bits].sum(axis=1, dtype=np.int64)
+    kw["active_days"] = active[pd.Index(kw_uniques).get_indexer(kw["keyword"])].astype(int)
+    return _add_kw_ratios(kw), totals
+
+def _add_kw_ratios(kw: pd.DataFrame) -> pd.DataFrame:
     kw["ctr"] = (kw["clicks"] / kw["impressions"]).replace([np.inf, -np.inf], 0).fillna(0).round(6)
     kw["cpc"] = (kw["cost"] / kw["clicks"]).replace([np.inf, -np.inf], 0).fillna(0).round(2)
     kw["roas_14d"] = (kw["revenue_14d"] / kw["cost"] * 100).replace([np.inf, -np.inf], 0).fillna(0).round(2)
-    return kw, totals
+    return kw
+
+# ---- 지면별 분해 ----
+def _surface_codes(s: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """지면 컬럼의 정수 코드/이름(category면 코드 그대로, 아니면 factorize)."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.cat.codes.to_numpy(), s.cat.categories
+    codes, uniques = pd.factorize(s)
+    return codes, pd.Index(uniques)
+
+def _surface_breakdown(base: pd.DataFrame) -> pd.DataFrame:
+    """
+    지면별 지표 합계(index=지면). df·kw 모두 받으며 지면 코드 하나로 bincount 한 번씩만 돈다.
+    행이 없는 카테고리는 빼고 광고비 내림차순.
+    """
+    codes, names = _surface_codes(base["surface"])
+    ok = codes >= 0
+    codes = codes[ok]
+    out = pd.DataFrame(
+        {c: np.bincount(codes, weights=base[c].to_numpy()[ok], minlength=len(names)).astype(np.int64)
+         for c in HIST_METRIC_COLS},
+        index=pd.Index(names.astype(str), name="surface"),
+    )
+    out = out[np.bincount(codes, minlength=len(names)) > 0]
+    return out.sort_values("cost", ascending=False, kind="stable")
+
+def _surface_pivot(kw: pd.DataFrame, values: Iterable[str] = ("cost", "revenue_14d")) -> pd.DataFrame:
+    """키워드 × 지면 피벗(컬럼: (지표, 지면)). kw 한 번 훑어 키워드·지면 코드 조합으로 합산."""
+    s_codes, s_names = _surface_codes(kw["surface"])
+    k_codes, k_names = pd.factorize(kw["keyword"])
+    n_s = len(s_names)
+    cell = k_codes * n_s + s_codes
+    ok = s_codes >= 0
+    used = np.bincount(s_codes[ok], minlength=n_s) > 0
+    cols = {}
+    for v in values:
+        grid = np.bincount(cell[ok], weights=kw[v].to_numpy()[ok], minlength=len(k_names) * n_s)
+        grid = grid.reshape(len(k_names), n_s)[:, used]
+        for j, name in enumerate(np.asarray(s_names.astype(str))[used]):
+            cols[(v, name)] = grid[:, j].astype(np.int64)
+    return pd.DataFrame(cols, index=pd.Index(np.asarray(k_names, dtype=object), name="keyword"))
+
+# ---- 대용량 모드: 청크 단위 읽기/누적 ----
+
+def _iter_raw_chunks(upload, chunksize: int = STREAM_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """CSV는 read_csv(chunksize), xlsx는 openpyxl read_only로 chunksize 행씩 원본 프레임을 생성."""
+    upload.seek(0)
+    try:
+        if upload.name.lower().endswith(".csv"):
+            reader = pd.read_csv(upload, usecols=_is_load_col, chunksize=chunksize)
+            first = True
+            for chunk in reader:
+                if first:
+                    missing = [c for c in REQUIRED_COLS if c not in chunk.columns]
+                    if missing:
+                        raise ValueError(f"필수 컬럼 누락: {missing}")
+                    first = False
+                yield chunk
+            return
+        wb = openpyxl.load_workbook(upload, read_only=True, data_only=True)
+        try:
+            ws = wb[wb.sheetnames[0]]
+            it = ws.iter_rows(values_only=True)
+            header = list(next(it, ()))
+            missing = [c for c in REQUIRED_COLS if c not in header]
+            if missing:
+                raise ValueError(f"필수 컬럼 누락: {missing}")
+            idx = [i for i, h in enumerate(header) if _is_load_col(h)]
+            names = [header[i] for i in idx]
+            buf: List[Tuple[Any, ...]] = []
+            for row in it:
+                buf.append(tuple(row[i] if i < len(row) else None for i in idx))
+                if len(buf) >= chunksize:
+                    yield pd.DataFrame(buf, columns=names)
+                    buf = []
+            if buf:
+                yield pd.DataFrame(buf, columns=names)
+        finally:
+            # 파싱 오류·중간 중단(제너레이터 close)에도 워크북 핸들 정리
+            wb.close()
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"파일 로드 실패: {e}")
+
+def _bitset_set(bits: np.ndarray, day0: int | None, rows: np.ndarray, ords: np.ndarray) -> Tuple[np.ndarray, int]:
+    """행별 일자 비트셋(uint8, little bit order)에 (행, 일자 번호)를 켠다. 범위가 넓어지면 배열을 키운다."""
+    lo, hi = int(ords.min()), int(ords.max())
+    if day0 is None:
+        day0 = lo
+    if lo < day0:
+        unpacked = np.unpackbits(bits, axis=1, bitorder="little")
+        bits = np.packbits(np.pad(unpacked, ((0, 0), (day0 - lo, 0))), axis=1, bitorder="little")
+        day0 = lo
+    need_rows = int(rows.max()) + 1
+    need_bytes = (hi - day0) // 8 + 1
+    if need_rows > bits.shape[0] or need_bytes > bits.shape[1]:
+        bits = np.pad(bits, ((0, max(0, need_rows - bits.shape[0])), (0, max(0, need_bytes - bits.shape[1]))))
+    d = ords - day0
+    np.bitwise_or.at(bits, (rows, d >> 3), np.left_shift(1, d & 7).astype(np.uint8))
+    return bits, day0
+
+def _aggregate_kw_stream(
+    raw_chunks: Iterable[pd.DataFrame],
+    product_index: ProductNameIndex | None = None,
+) -> Dict[str, Tuple[pd.DataFrame, Dict[str, Any]]]:
+    """
+    _aggregate_kw의 대용량 모드. 원본 청크마다 _normalize 후
+    (상품, 키워드, 지면) 합계와 (상품, 키워드) 노출일 비트셋에 누적한다.
+    메모리는 고유 키워드 수 × 기간에 비례(행 수와 무관).
+    반환: {상품: (kw, totals)} — 상품별로 _aggregate_kw(df[df.product == 상품])와 같은 값.
+    """
+    keys = ["product", "keyword", "surface"]
+    acc: pd.DataFrame | None = None
+    dates: pd.DataFrame | None = None
+    bit_index = pd.MultiIndex.from_arrays([[], []], names=["product", "keyword"])
+    bits = np.zeros((0, 1), dtype=np.uint8)
+    day0: int | None = None
+
+    for raw in raw_chunks:
+        chunk = _normalize(raw, product_index)
+        del raw
+        if chunk.empty:
+            continue
+        for c in keys:
+            chunk[c] = chunk[c].astype(object)
+        part = chunk.groupby(keys, sort=False)[HIST_METRIC_COLS].sum()
+        acc = part if acc is None else pd.concat([acc, part]).groupby(level=keys, sort=False).sum()
+        d = chunk.groupby("product", sort=False)["date"].agg(["min", "max"])
+        dates = d if dates is None else pd.concat([dates, d]).groupby(level=0).agg({"min": "min", "max": "max"})
+
+        pos = chunk[chunk["impressions"] > 0]
+        if pos.empty:
+            continue
+        pk = pd.MultiIndex.from_arrays([pos["product"].to_numpy(), pos["keyword"].to_numpy()])
+        new = pk.unique().difference(bit_index, sort=False)
+        if len(new):
+            bit_index = bit_index.append(new)
+        rows = bit_index.get_indexer(pk)
+        d_codes, d_uniques = pd.factorize(pos["date"])
+        ords = np.array([x.toordinal() for x in d_uniques], dtype=np.int64)[d_codes]
+        bits, day0 = _bitset_set(bits, day0, rows, ords)
+
+    out: Dict[str, Tuple[pd.DataFrame, Dict[str, Any]]] = {}
+    if acc is None:
+        return out
+    acc = acc.reset_index()
+    active = _POPCOUNT8[bits].sum(axis=1, dtype=np.int64)
+    for product, kw in acc.groupby("product", sort=True):
+        kw = kw.sort_values(["keyword", "surface"]).drop(columns="product").reset_index(drop=True)
+        rows = bit_index.get_indexer(pd.MultiIndex.from_arrays([np.full(len(kw), product, dtype=object), kw["keyword"].to_numpy()]))
+        kw["active_days"] = np.where(rows >= 0, active[np.maximum(rows, 0)], 0).astype(int)
+        totals = {
+            "total_cost": int(kw["cost"].sum()),
+            "total_rev": int(kw["revenue_14d"].sum()),
+            "total_orders": int(kw["orders_14d"].sum()),
+            "date_min": dates.loc[product, "min"],
+            "date_max": dates.loc[product, "max"],
+            "by_surface": _surface_breakdown(kw),
+        }
+        out[str(product)] = (_add_kw_ratios(kw), totals)
+    return out
 
 # ===================== 컷 구조체 =====================
 @dataclass(frozen=True)
@@ -140,11 +463,12 @@ class CpcCuts:
     top: float
 
 # ===================== 지표/표시 =====================
-def _search_shares_for_cuts(kw: pd.DataFrame, cuts: CpcCuts) -> Dict[str, float]:
+def _search_shares_for_cuts(kw: pd.DataFrame, cuts: CpcCuts, surface: str = SURF_SEARCH_VALUE) -> Dict[str, float]:
+    """컷 밖 광고비/매출 비중. *_search 키는 surface(기본: 검색 영역) 안에서의 비중."""
     total_cost_all = float(kw["cost"].sum())
     total_rev_all = float(kw["revenue_14d"].sum())
 
-    kw_search_all = kw[kw["surface"] == SURF_SEARCH_VALUE]
+    kw_search_all = kw[kw["surface"] == surface]
     total_cost_search = float(kw_search_all["cost"].sum())
     total_rev_search = float(kw_search_all["revenue_14d"].sum())
 
@@ -155,7 +479,7 @@ def _search_shares_for_cuts(kw: pd.DataFrame, cuts: CpcCuts) -> Dict[str, float]
             "cost_share_top_search","rev_share_top_search"
         ]}
 
-    base = kw[(kw["surface"] == SURF_SEARCH_VALUE) & (kw["clicks"] > 0)].copy()
+    base = kw[(kw["surface"] == surface) & (kw["clicks"] > 0)].copy()
 
     if "cpc" not in base.columns or base["cpc"].isna().any():
         base["cpc"] = base["cost"] / base["clicks"]
@@ -189,25 +513,165 @@ def _search_shares_for_cuts(kw: pd.DataFrame, cuts: CpcCuts) -> Dict[str, float]
         "rev_share_top_search":     _pct(rev_ge_top,      total_rev_search),
     }
 
-def _display_table(title: str, dff: pd.DataFrame, extra: Iterable[str] | None = None) -> None:
+# ===================== 컷 추천(자동) =====================
+def _recommend_cuts(
+    kw: pd.DataFrame,
+    max_candidates: int = 400,
+    breakeven_roas: float = 0.0,
+    top_n: int = 5,
+    surface: str = SURF_SEARCH_VALUE,
+) -> Dict[str, pd.DataFrame]:
+    """
+    (bottom, top) 후보쌍 전체를 벡터 연산으로 평가.
+    - 후보 CPC: surface(기본: 검색 영역) 전환 키워드 누적곡선의 x값(분위수로 최대 max_candidates개)
+    - 컷 밖(≤bottom, ≥top) 해당 지면 키워드를 끄는 것으로 보고 절감 광고비/손실 매출(원) 계산
+    - score(원) = 절감 광고비 - 손실 매출 × 공헌이익률, 공헌이익률 = 100 / 손익분기 ROAS(%)
+      (손익분기 ROAS가 0이거나 100% 미만이면 1.0: 어떤 이익률에서도 이익을 줄이지 않는 보수적 기준)
+    반환: {"best": 이익이 늘어나는(score > 0) 상위 top_n, "pareto": 손실매출↓·절감광고비↑ 파레토 프론티어}
+    """
+    empty = pd.DataFrame(columns=["bottom", "top", "cost_saved_pct", "rev_lost_pct", "rev_kept_pct", "score"])
+    search = kw[(kw["surface"] == surface) & (kw["clicks"] > 0)]
+    conv_x = search.loc[search["orders_14d"] > 0, "cpc"].to_numpy(float)
+    conv_x = np.unique(conv_x[np.isfinite(conv_x)])
+    total_cost = float(search["cost"].sum())
+    total_rev = float(search["revenue_14d"].sum())
+    if conv_x.size < 2 or total_cost <= 0 or total_rev <= 0:
+        return {"best": empty, "pareto": empty}
+
+    if conv_x.size > max_candidates:
+        conv_x = np.unique(np.quantile(conv_x, np.linspace(0.0, 1.0, int(max_candidates))))
+
+    order = np.argsort(search["cpc"].to_numpy(float), kind="stable")
+    cpc_sorted = search["cpc"].to_numpy(float)[order]
+    cum_cost = np.concatenate(([0.0], np.cumsum(search["cost"].to_numpy(float)[order])))
+    cum_rev = np.concatenate(([0.0], np.cumsum(search["revenue_14d"].to_numpy(float)[order])))
+
+    # bottom: cpc ≤ c 누적 / top: cpc ≥ c 누적
+    i_le = np.searchsorted(cpc_sorted, conv_x, side="right")
+    i_lt = np.searchsorted(cpc_sorted, conv_x, side="left")
+    cost_le, rev_le = cum_cost[i_le], cum_rev[i_le]
+    cost_ge, rev_ge = cum_cost[-1] - cum_cost[i_lt], cum_rev[-1] - cum_rev[i_lt]
+
+    be = float(breakeven_roas)
+    margin = min(1.0, 100.0 / be) if be > 0 else 1.0
+    b_idx, t_idx = np.triu_indices(conv_x.size, k=1)
+    cost_saved_won = cost_le[b_idx] + cost_ge[t_idx]
+    rev_lost_won = rev_le[b_idx] + rev_ge[t_idx]
+    cost_saved = cost_saved_won / total_cost * 100
+    rev_lost = rev_lost_won / total_rev * 100
+    score = cost_saved_won - margin * rev_lost_won
+
+    res = pd.DataFrame({
+        "bottom": conv_x[b_idx],
+        "top": conv_x[t_idx],
+        "cost_saved_pct": cost_saved.round(2),
+        "rev_lost_pct": rev_lost.round(2),
+        "rev_kept_pct": (100 - rev_lost).round(2),
+        "score": score.round(0),
+    })
+
+    gain = np.flatnonzero(score > 0)
+    k = min(int(top_n), gain.size)
+    if k == 0:
+        best = empty
+    else:
+        best_idx = gain[np.argpartition(-score[gain], k - 1)[:k]]
+        best = res.iloc[best_idx[np.argsort(-score[best_idx], kind="stable")]].reset_index(drop=True)
+
+    # 파레토: 손실 매출 오름차순(동률이면 절감 광고비 내림차순) 후 절감 광고비가 갱신되는 점만
+    p_order = np.lexsort((-cost_saved, rev_lost))
+    cs_sorted = cost_saved[p_order]
+    prev_max = np.concatenate(([-np.inf], np.maximum.accumulate(cs_sorted)[:-1]))
+    pareto = res.iloc[p_order[cs_sorted > prev_max]].reset_index(drop=True)
+    return {"best": best, "pareto": pareto}
+
+def _display_table(
+    title: str,
+    dff: pd.DataFrame,
+    extra: Iterable[str] | None = None,
+    mask: np.ndarray | None = None,
+    extra_values: Dict[str, np.ndarray] | None = None,
+) -> None:
+    """
+    mask가 주어지면 dff 전체를 복사하지 않고 해당 행 중 광고비 상위 200개만 꺼내 표시.
+    extra_values: dff 행 순서와 같은 길이의 배열을 표시용 컬럼으로 덧붙임.
+    """
     cols = [
         "keyword","surface","active_days","impressions","clicks","cost",
         "orders_14d","revenue_14d","ctr","cpc","roas_14d",
     ]
-    if dff.empty:
+    idx = np.flatnonzero(mask) if mask is not None else np.arange(len(dff))
+    if idx.size == 0:
         st.markdown(f"#### {title} (0개)")
         return
     if extra:
         cols += list(extra)
-    st.markdown(f"#### {title} ({len(dff)}개)")
-    st.dataframe(dff.sort_values("cost", ascending=False)[cols].head(200),
+    st.markdown(f"#### {title} ({idx.size}개)")
+    cost = dff["cost"].to_numpy()[idx]
+    top = idx[np.argsort(-cost, kind="stable")[:200]]
+    view = dff.iloc[top][cols]
+    for name, values in (extra_values or {}).items():
+        view[name] = np.asarray(values)[top]
+    st.dataframe(view,
                  use_container_width=True, hide_index=True)
 
 
 # ===================== 차트(수동 컷만) =====================
-def _plot_cpc_curve_plotly_manual(kw: pd.DataFrame, selected: CpcCuts) -> None:
-    # 검색 영역만 누적에 포함
-    conv = kw[(kw["orders_14d"] > 0) & (kw["cpc"].notna()) & (kw["surface"] == SURF_SEARCH_VALUE)].copy()
+def _lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: 곡선 모양을 유지하는 n_out개 점의 인덱스(첫/끝 점 포함)."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    out = np.empty(n_out, dtype=int)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        nlo, nhi = hi, (edges[b + 2] if b + 2 < len(edges) else n)
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        out[b + 1] = a
+    return out
+
+def _cut_neighbors(x: np.ndarray, keep_x: Iterable[float]) -> np.ndarray:
+    """정렬된 x에서 각 컷 지점 양옆 원본 점의 인덱스."""
+    pos = np.searchsorted(x, np.asarray(list(keep_x), dtype=float), side="right")
+    around = np.concatenate((pos - 1, pos))
+    return around[(around >= 0) & (around < len(x))]
+
+def _array_fingerprint(*parts: Any) -> str:
+    """배열/스칼라 내용 해시(dtype·shape 포함). 차트 캐시 키용."""
+    h = hashlib.blake2b(digest_size=16)
+    for p in parts:
+        a = np.ascontiguousarray(p)
+        h.update(f"{a.dtype}{a.shape}".encode())
+        h.update(repr(a.tolist()).encode() if a.dtype == object else a.tobytes())
+    return h.hexdigest()
+
+def _session_cached(key: str, build: Callable[[], Any]) -> Any:
+    """세션에 차트 재료(Figure 등)를 키별로 보관하고, 없을 때만 build()로 만든다(오래된 것부터 FIG_CACHE_MAX개 초과분 제거)."""
+    cache: Dict[str, Any] = st.session_state.setdefault("ad_fig_cache", {})
+    val = cache.pop(key, None)
+    if val is None:
+        val = build()
+        while len(cache) >= FIG_CACHE_MAX:
+            cache.pop(next(iter(cache)))
+    cache[key] = val  # 최근 사용 순서로 다시 넣음
+    return val
+
+def _cut_shapes(cuts: CpcCuts) -> List[Dict[str, Any]]:
+    """add_vline과 같은 모양의 컷 기준선 두 개(bottom=파랑, top=빨강)."""
+    return [
+        dict(type="line", xref="x", yref="y domain", x0=float(x), x1=float(x), y0=0, y1=1,
+             line=dict(color=color, width=3, dash="dash"), opacity=1.0)
+        for x, color in ((cuts.bottom, "blue"), (cuts.top, "red"))
+    ]
+
+def _plot_cpc_curve_plotly_manual(kw: pd.DataFrame, selected: CpcCuts, surface: str = SURF_SEARCH_VALUE) -> None:
+    # 선택 지면(기본: 검색 영역)만 누적에 포함
+    conv = kw[(kw["orders_14d"] > 0) & (kw["cpc"].notna()) & (kw["surface"] == surface)].copy()
     if conv.empty:
         st.warning("전환 발생 키워드가 없어 그래프를 표시할 수 없습니다.")
         return
@@ -221,23 +685,35 @@ def _plot_cpc_curve_plotly_manual(kw: pd.DataFrame, selected: CpcCuts) -> None:
     x_vals = conv["cpc"].to_numpy(float)
     y_share_conv = (conv["revenue_14d"].cumsum().to_numpy(float) / total_conv_rev).clip(0, 1)
 
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=x_vals, y=y_share_conv, mode="lines", line=dict(width=2),
-        name="누적비중(≤CPC)", hovertemplate="CPC=%{x:.0f}<br>Share=%{y:.2%}<extra></extra>",
-    ))
-    # 사용자가 입력한 두 개의 기준선만 표시
-    fig.add_vline(x=float(selected.bottom), line_dash="dash", opacity=1.0, line_color="blue", line_width=3)
-    fig.add_vline(x=float(selected.top),    line_dash="dash", opacity=1.0, line_color="red",  line_width=3)
-
-    fig.update_layout(
-        height=380,
-        margin=dict(l=20, r=20, t=30, b=20),
-        xaxis_title="CPC",
-        yaxis_title="누적매출비중(conv)",
-        yaxis=dict(tickformat=".0%"),
-        showlegend=False
-    )
+    downsample = len(x_vals) > CURVE_WEBGL_THRESHOLD
+
+    def _build() -> Tuple[Optional[np.ndarray], go.Figure]:
+        # 대량 키워드: 컷과 무관한 LTTB 인덱스만 캐시(컷 양옆 점은 매 렌더마다 합침) + WebGL
+        base = _lttb_indices(x_vals, y_share_conv, CURVE_MAX_POINTS) if downsample else None
+        trace_cls = go.Scattergl if downsample else go.Scatter
+        fig = go.Figure()
+        fig.add_trace(trace_cls(
+            x=x_vals if base is None else x_vals[base],
+            y=y_share_conv if base is None else y_share_conv[base],
+            mode="lines", line=dict(width=2),
+            name="누적비중(≤CPC)", hovertemplate="CPC=%{x:.0f}<br>Share=%{y:.2%}<extra></extra>",
+        ))
+        fig.update_layout(
+            height=380,
+            margin=dict(l=20, r=20, t=30, b=20),
+            xaxis_title="CPC",
+            yaxis_title="누적매출비중(conv)",
+            yaxis=dict(tickformat=".0%"),
+            showlegend=False
+        )
+        return base, fig
+
+    # 곡선 데이터가 같으면 LTTB·Figure는 재사용하고, 컷 양옆 점과 두 기준선(shape)만 교체
+    base, fig = _session_cached("cpc_curve:" + _array_fingerprint(x_vals, y_share_conv), _build)
+    if base is not None:
+        keep = np.union1d(base, _cut_neighbors(x_vals, (selected.bottom, selected.top)))
+        fig.data[0].update(x=x_vals[keep], y=y_share_conv[keep])
+    fig.update_layout(shapes=_cut_shapes(selected))
     st.plotly_chart(fig, use_container_width=True)
 
 # ===================== AOV, 제외 계산 =====================
@@ -257,44 +733,376 @@ def _aov_p50(df: pd.DataFrame) -> float:
         return 0.0
     return float(np.median(aov))
 
-def _compute_exclusions(kw: pd.DataFrame, cuts: CpcCuts, aov_p50_value: float, breakeven_roas: float) -> Dict[str, pd.DataFrame]:
-    ex_a = kw[(kw["orders_14d"] == 0) & (kw["cpc"] >= cuts.top)].copy()
-    ex_b = kw[(kw["orders_14d"] == 0) & (kw["cpc"] <= cuts.bottom) & (kw["clicks"] >= 1)].copy()
-    cpc_global_p50 = float(kw.loc[kw["clicks"] > 0, "cpc"].quantile(0.5)) if (kw["clicks"] > 0).any() else 0.0
-    ex_c = kw[kw["orders_14d"] == 0].copy()
-    ex_c["next_click_cost"] = np.where(ex_c["cpc"] > 0, ex_c["cpc"], cpc_global_p50)
-    ex_c["cost_after_1click"] = ex_c["cost"] + ex_c["next_click_cost"]
-    ex_c["roas_if_1_order"] = (
-        (aov_p50_value / ex_c["cost_after_1click"] * 100)
-        .replace([np.inf, -np.inf], 0)
-        .fillna(0)
-        .round(2)
-        if aov_p50_value > 0
-        else 0.0
-    )
-    ex_c = ex_c[ex_c["roas_if_1_order"] <= float(breakeven_roas)].copy()
-    ex_d = kw[(kw["roas_14d"] > 0) & (kw["roas_14d"] < float(breakeven_roas))].copy()
-    return {"a": ex_a, "b": ex_b, "c": ex_c, "d": ex_d}
+def _prepare_exclusion_cols(kw: pd.DataFrame, aov_p50_value: float) -> None:
+    """
+    컷/손익 ROAS와 무관한 제외 계산용 컬럼을 kw에 한 번만 추가(in-place).
+    - next_click_cost: cpc(없으면 전체 클릭 키워드 CPC 중앙값)
+    - cost_after_1click, roas_if_1_order
+    같은 kw·AOV로 다시 호출되면 재계산하지 않는다.
+    """
+    if "roas_if_1_order" in kw.columns and kw.attrs.get("excl_aov_p50") == float(aov_p50_value):
+        return
+    if "next_click_cost" not in kw.columns:
+        clicked = kw["clicks"].to_numpy() > 0
+        cpc = kw["cpc"].to_numpy(float)
+        cpc_global_p50 = float(np.quantile(cpc[clicked], 0.5)) if clicked.any() else 0.0
+        kw["next_click_cost"] = np.where(cpc > 0, cpc, cpc_global_p50)
+        kw.attrs["cpc_global_p50"] = cpc_global_p50
+        kw["cost_after_1click"] = kw["cost"] + kw["next_click_cost"]
+    if aov_p50_value > 0:
+        kw["roas_if_1_order"] = (
+            (aov_p50_value / kw["cost_after_1click"] * 100)
+            .replace([np.inf, -np.inf], 0)
+            .fillna(0)
+            .round(2)
+        )
+    else:
+        kw["roas_if_1_order"] = 0.0
+    kw.attrs["excl_aov_p50"] = float(aov_p50_value)
+
+def _exclusion_masks(kw: pd.DataFrame, cuts: CpcCuts, breakeven_roas: float) -> Dict[str, np.ndarray]:
+    """컷·손익 ROAS만 적용하는 a~d 불리언 마스크(kw 행 순서 기준)."""
+    zero_ord = kw["orders_14d"].to_numpy() == 0
+    cpc = kw["cpc"].to_numpy(float)
+    roas = kw["roas_14d"].to_numpy(float)
+    be = float(breakeven_roas)
+    return {
+        "a": zero_ord & (cpc >= cuts.top),
+        "b": zero_ord & (cpc <= cuts.bottom) & (kw["clicks"].to_numpy() >= 1),
+        "c": zero_ord & (kw["roas_if_1_order"].to_numpy(float) <= be),
+        "d": (roas > 0) & (roas < be),
+    }
+
+def _excludable_rows(kw: pd.DataFrame) -> np.ndarray:
+    """제외 키워드로 걸 수 있는 행: 검색 영역의 실제 키워드('-'는 비검색 지면 집계 행)."""
+    return ((kw["surface"] == SURF_SEARCH_VALUE) & (kw["keyword"] != "-")).to_numpy()
+
+def _compute_exclusions(kw: pd.DataFrame, cuts: CpcCuts, aov_p50_value: float, breakeven_roas: float) -> Dict[str, np.ndarray]:
+    _prepare_exclusion_cols(kw, aov_p50_value)
+    return _exclusion_masks(kw, cuts, breakeven_roas)
+
+# ===================== 부트스트랩 신뢰도 =====================
+def _iter_boot_sums(
+    df: pd.DataFrame,
+    kw: pd.DataFrame,
+    rows: np.ndarray,
+    n_boot: int = BOOT_RESAMPLES,
+    seed: int = BOOT_SEED,
+) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    kw의 rows(인덱스) 각각에 속한 일별 행을 Poisson(1) 가중으로 재표본한 합계를 배치 단위로 생성.
+    각 배치: {"clicks","cost","orders","rev"} → (len(rows) × 배치 반복 수)
+    """
+    key = pd.MultiIndex.from_arrays([kw["keyword"].to_numpy()[rows], kw["surface"].to_numpy()[rows]])
+    gid = key.get_indexer(pd.MultiIndex.from_arrays([df["keyword"].to_numpy(), df["surface"].to_numpy()]))
+    # 클릭·광고비·주문·매출이 모두 0인 행(노출만 있는 날)은 합계에 기여하지 않으므로 제외
+    nonzero = (df["clicks"].to_numpy() > 0) | (df["cost"].to_numpy() > 0) | (df["orders_14d"].to_numpy() > 0) | (df["revenue_14d"].to_numpy() > 0)
+    sel = np.flatnonzero((gid >= 0) & nonzero)
+    order = sel[np.argsort(gid[sel], kind="stable")]
+    g_sorted = gid[order]
+    starts = np.flatnonzero(np.r_[True, g_sorted[1:] != g_sorted[:-1]]) if order.size else np.zeros(0, dtype=np.int64)
+    present = g_sorted[starts]
+    metrics = {
+        "clicks": df["clicks"].to_numpy(np.float32)[order],
+        "cost": df["cost"].to_numpy(np.float32)[order],
+        "orders": df["orders_14d"].to_numpy(np.float32)[order],
+        "rev": df["revenue_14d"].to_numpy(np.float32)[order],
+    }
+    rng = np.random.default_rng(seed)
+    batch = max(1, min(int(n_boot), BOOT_CELL_BUDGET // max(len(order), 1)))
+    done = 0
+    while done < n_boot:
+        b = min(batch, n_boot - done)
+        # (반복 × 행) 배치: uint16 난수 → Poisson(1) 표 조회, 행 방향이 연속이라 reduceat이 빠르다
+        w = _POISSON1_TABLE[rng.integers(0, 65536, size=(b, len(order)), dtype=np.uint16)]
+        out = {}
+        for k, v in metrics.items():
+            full = np.zeros((len(rows), b), dtype=np.float64)
+            if order.size:
+                full[present] = np.add.reduceat(w * v[None, :], starts, axis=1).T
+            out[k] = full
+        yield out
+        done += b
+
+def _bootstrap_samples(
+    df: pd.DataFrame,
+    kw: pd.DataFrame,
+    n_boot: int = BOOT_RESAMPLES,
+    seed: int = BOOT_SEED,
+    ci: float = BOOT_CI,
+) -> Dict[str, Any]:
+    """
+    컷·손익 ROAS와 무관한 재표본 결과(데이터·반복 수가 같으면 세션에 두고 재사용).
+    - zero_rows/cpc/roas_if_1: 전환 0 키워드 행(a~c 후보)과 재표본별 CPC(클릭 0이면 NaN)·전환 시 ROAS
+    - pos_rows/roas: ROAS > 0 키워드 행(d 후보)과 재표본별 ROAS
+    - roas_lo/roas_hi: 행별 ROAS 신뢰구간(후보·전환 행 밖은 NaN), aov_lo/aov_hi: _aov_p50의 신뢰구간
+    재표본 행렬은 float32. kw에는 _prepare_exclusion_cols가 먼저 적용돼 있어야 한다.
+    """
+    n = len(kw)
+    zero = kw["orders_14d"].to_numpy() == 0
+    pos = kw["roas_14d"].to_numpy(float) > 0
+    conv = (kw["orders_14d"].to_numpy() > 0) & kw["cpc"].notna().to_numpy()
+    rows = np.flatnonzero(zero | pos | conv)
+    out: Dict[str, Any] = {
+        "n_boot": int(n_boot),
+        "zero_rows": np.flatnonzero(zero), "pos_rows": np.flatnonzero(pos),
+        "roas_lo": np.full(n, np.nan), "roas_hi": np.full(n, np.nan),
+        "aov_lo": 0.0, "aov_hi": 0.0,
+    }
+    z_in, p_in = np.flatnonzero(zero[rows]), np.flatnonzero(pos[rows])
+    p50 = float(kw.attrs.get("cpc_global_p50", 0.0))
+    conv_r = conv[rows]
+    cpc_parts: List[np.ndarray] = []
+    r1_parts: List[np.ndarray] = []
+    roas_parts: List[np.ndarray] = []
+    aov_parts: List[np.ndarray] = []
+    for bs in _iter_boot_sums(df, kw, rows, n_boot, seed):
+        clicks, cost, orders, rev = bs["clicks"], bs["cost"], bs["orders"], bs["rev"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cpc = np.where(clicks > 0, cost / clicks, np.nan)
+            roas = np.where(cost > 0, rev / cost * 100, 0.0)
+            aov_kw = np.where(conv_r[:, None] & (orders > 0), rev / orders, np.nan)
+        aov = np.nan_to_num(np.nanmedian(aov_kw, axis=0) if conv_r.any() else np.zeros(clicks.shape[1]))
+        next_cost = np.where(cpc > 0, cpc, p50)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            roas_if_1 = np.where((aov[None, :] > 0) & (cost + next_cost > 0), aov[None, :] / (cost + next_cost) * 100, 0.0)
+        cpc_parts.append(cpc[z_in].astype(np.float32))
+        r1_parts.append(roas_if_1[z_in].astype(np.float32))
+        roas_parts.append(roas.astype(np.float32))
+        aov_parts.append(aov)
+
+    alpha = (1 - float(ci)) / 2
+    roas_all = np.concatenate(roas_parts, axis=1) if roas_parts else np.zeros((len(rows), 0), np.float32)
+    if rows.size and roas_all.shape[1]:
+        lo, hi = np.quantile(roas_all, [alpha, 1 - alpha], axis=1)
+        out["roas_lo"][rows], out["roas_hi"][rows] = lo.round(2), hi.round(2)
+        out["aov_lo"], out["aov_hi"] = (float(v) for v in np.quantile(np.concatenate(aov_parts), [alpha, 1 - alpha]))
+    out["roas"] = roas_all[p_in]
+    out["cpc"] = np.concatenate(cpc_parts, axis=1) if cpc_parts else np.zeros((len(z_in), 0), np.float32)
+    out["roas_if_1"] = np.concatenate(r1_parts, axis=1) if r1_parts else np.zeros((len(z_in), 0), np.float32)
+    return out
+
+def _bootstrap_exclusions(
+    samples: Dict[str, Any],
+    kw: pd.DataFrame,
+    cuts: CpcCuts,
+    breakeven_roas: float,
+    masks: Dict[str, np.ndarray],
+) -> Dict[str, Any]:
+    """
+    _bootstrap_samples 결과에 컷·손익 ROAS를 적용해 제외 구분별 신뢰도를 계산(재표본 없이 비교·합계만).
+    - confidence[a~d]: 재표본 중 해당 제외 조건을 계속 만족한 비율(마스크 밖 행은 NaN)
+    - roas_lo/roas_hi: 제외 대상·전환 키워드 행의 ROAS 신뢰구간(그 외 NaN)
+    - aov_lo/aov_hi: _aov_p50(전환 키워드 AOV 중앙값)의 신뢰구간
+    """
+    n = len(kw)
+    n_boot = max(int(samples["n_boot"]), 1)
+    z, p = samples["zero_rows"], samples["pos_rows"]
+    cpc, r1, roas = samples["cpc"], samples["roas_if_1"], samples["roas"]
+    be = float(breakeven_roas)
+    hits = {k: np.zeros(n) for k in EXCL_LABELS}
+    # 클릭 0인 재표본은 CPC 0으로 본다(a: 0 >= top일 때만 해당, b: 클릭 1 이상 조건으로 제외)
+    no_click = np.isnan(cpc).sum(axis=1) if float(cuts.top) <= 0 else 0
+    hits["a"][z] = (cpc >= cuts.top).sum(axis=1) + no_click
+    hits["b"][z] = (cpc <= cuts.bottom).sum(axis=1)
+    hits["c"][z] = (r1 <= be).sum(axis=1)
+    hits["d"][p] = ((roas > 0) & (roas < be)).sum(axis=1)
+
+    conv = (kw["orders_14d"].to_numpy() > 0) & kw["cpc"].notna().to_numpy()
+    shown = conv.copy()
+    for m in masks.values():
+        shown |= m
+    out: Dict[str, Any] = {
+        "roas_lo": np.where(shown, samples["roas_lo"], np.nan),
+        "roas_hi": np.where(shown, samples["roas_hi"], np.nan),
+        "aov_lo": samples["aov_lo"] if shown.any() else 0.0,
+        "aov_hi": samples["aov_hi"] if shown.any() else 0.0,
+    }
+    for k in EXCL_LABELS:
+        out[k] = np.where(masks[k], (hits[k] / n_boot).round(3), np.nan)
+    return out
+
+# ===================== 제외 키워드 내보내기 =====================
+EXCL_LABELS = {
+    "a": "CPC_cut top 이상 전환 0",
+    "b": "CPC_cut bottom 이하 전환 0",
+    "c": "전환 시 손익 ROAS 미달",
+    "d": "손익 ROAS 미달",
+}
+
+def _dedup_exclusion_keywords(kw: pd.DataFrame, masks: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    a→d 순서로 키워드를 배정(앞 구분에 이미 나온 키워드는 제외). 행 복사 없이 코드 배열로 처리.
+    검색 영역의 실제 키워드만 내보낸다(_excludable_rows).
+    """
+    codes, uniques = pd.factorize(kw["keyword"], sort=False)
+    ok = _excludable_rows(kw)
+    seen = np.zeros(len(uniques), dtype=bool)
+    out: Dict[str, np.ndarray] = {}
+    for key in EXCL_LABELS:
+        c = codes[masks[key] & ok]
+        c = c[~seen[c]]
+        _, first = np.unique(c, return_index=True)
+        c = c[np.sort(first)]
+        seen[c] = True
+        out[key] = np.asarray(uniques)[c]
+    return out
+
+def _default_cuts(kw: pd.DataFrame) -> CpcCuts:
+    """수동 입력 초기값과 같은 컷(전환 키워드 CPC 최소/최대)."""
+    x = kw.loc[(kw["orders_14d"] > 0) & kw["cpc"].notna(), "cpc"].to_numpy(float)
+    if x.size == 0:
+        return CpcCuts(bottom=0.0, top=0.0)
+    return CpcCuts(bottom=float(np.nanmin(x)), top=float(np.nanmax(x)))
+
+def _iter_product_kw(df: pd.DataFrame) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """상품별 kw 집계를 하나씩 생성(상품 kw 프레임은 동시에 하나만 유지)."""
+    for product, sub in df.groupby("product", sort=True, observed=True):
+        kw, _ = _aggregate_kw(sub)
+        yield str(product), kw
+
+def _iter_product_exclusions(
+    product_kws: Iterable[Tuple[str, pd.DataFrame]],
+    breakeven_roas: float,
+    cuts_by_product: Dict[str, CpcCuts],
+) -> Iterator[Tuple[str, Dict[str, np.ndarray]]]:
+    """상품별 kw마다 마스크→키워드 배열을 생성."""
+    for product, kw in product_kws:
+        if kw.empty:
+            continue
+        cuts = cuts_by_product.get(product) or _default_cuts(kw)
+        conv = kw[(kw["orders_14d"] > 0) & (kw["cpc"].notna())]
+        masks = _compute_exclusions(kw, cuts, _aov_p50(conv), breakeven_roas)
+        yield str(product), _dedup_exclusion_keywords(kw, masks)
+
+def _write_exclusion_bundle(parts: Iterable[Tuple[str, Dict[str, np.ndarray]]]) -> bytes:
+    """
+    zip 번들: 상품별 a~d.txt(줄바꿈 구분 키워드) + 전체 통합 exclusions.xlsx.
+    txt와 xlsx(write_only) 모두 키워드를 한 줄씩 흘려 쓴다.
+    """
+    buf = io.BytesIO()
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("제외키워드")
+    ws.append(["상품", "구분", "키워드"])
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for product, sets in parts:
+            folder = product.replace("/", "_").replace("\\", "_") or "알 수 없음"
+            for key, label in EXCL_LABELS.items():
+                with zf.open(f"{folder}/{key}.txt", "w") as fh:
+                    for k in sets[key]:
+                        fh.write(f"{k}\n".encode("utf-8"))
+                        ws.append([product, f"{key}) {label}", k])
+        xbuf = io.BytesIO()
+        wb.save(xbuf)
+        zf.writestr("exclusions.xlsx", xbuf.getvalue())
+    return buf.getvalue()
+
+# ===================== 시나리오 시뮬레이션 =====================
+@dataclass(frozen=True)
+class SimScenario:
+    name: str
+    exclude: frozenset[str] = frozenset()  # 제외할 구분 {"a","b","c","d"}
+    bid_pct: float = 0.0                   # 남은 검색 키워드 입찰 변경률(%)
+
+def _scenario_grid(bid_pcts: Iterable[float] = (0.0,)) -> List[SimScenario]:
+    """기준(변경 없음) + a~d 부분집합 전체 × 입찰 변경률 조합."""
+    keys = list(EXCL_LABELS)
+    out = [SimScenario("기준")]
+    for bid in bid_pcts:
+        for r in range(len(keys) + 1):
+            for combo in itertools.combinations(keys, r):
+                if not combo and float(bid) == 0.0:
+                    continue
+                label = "+".join(combo) + " 제외" if combo else "제외 없음"
+                if float(bid) != 0.0:
+                    label += f" / 검색 입찰 {float(bid):+.0f}%"
+                out.append(SimScenario(label, frozenset(combo), float(bid)))
+    return out
+
+def _simulate_scenarios(
+    kw: pd.DataFrame,
+    masks: Dict[str, np.ndarray],
+    scenarios: List[SimScenario],
+    click_elasticity: float = SIM_CLICK_ELASTICITY,
+) -> pd.DataFrame:
+    """
+    시나리오별 예상 광고비/매출/주문/ROAS를 전체·검색·비검색으로 계산.
+    제외(a~d)와 입찰 변경은 검색 키워드에만 적용되고, 비검색 지면은 그대로 둔다.
+    행마다 a~d 소속 비트패턴(16가지)×검색 여부로 먼저 합계를 내 두고,
+    시나리오는 (제외 비트 & 패턴) == 0 인 패턴 합계만 더하므로 시나리오 수와 행 수가 곱해지지 않는다.
+    """
+    keys = list(EXCL_LABELS)
+    n_pat = 1 << len(keys)
+    # 제외 비트는 검색 영역의 실제 키워드에만('-' 비검색 집계 행은 키워드 제외로 끌 수 없다)
+    ok = _excludable_rows(kw)
+    pat = np.zeros(len(kw), dtype=np.int64)
+    for j, k in enumerate(keys):
+        pat |= (masks[k] & ok).astype(np.int64) << j
+    search = (kw["surface"] == SURF_SEARCH_VALUE).to_numpy()
+    grp = pat * 2 + search
+
+    def _sums(col: str) -> np.ndarray:
+        w = kw[col].to_numpy(np.float64)
+        return np.bincount(grp, weights=w, minlength=n_pat * 2).reshape(n_pat, 2)  # [:, 0]=비검색, [:, 1]=검색
+
+    cost, rev, orders, clicks = _sums("cost"), _sums("revenue_14d"), _sums("orders_14d"), _sums("clicks")
+
+    s_bits = np.array([sum(1 << j for j, k in enumerate(keys) if k in sc.exclude) for sc in scenarios], dtype=np.int64)
+    keep = ((s_bits[:, None] & np.arange(n_pat)[None, :]) == 0).astype(np.float64)  # 시나리오 × 패턴
+    bid = np.clip(1 + np.array([sc.bid_pct for sc in scenarios], dtype=np.float64) / 100, 0.0, None)
+    click_f = bid ** float(click_elasticity)
+    scale = {"clicks": click_f, "cost": bid * click_f, "rev": click_f}
+
+    def _proj(sums: np.ndarray, f: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        kept = keep @ sums
+        return kept[:, 1] * f, kept[:, 0]  # (검색, 비검색)
+
+    c_s, c_n = _proj(cost, scale["cost"])
+    r_s, r_n = _proj(rev, scale["rev"])
+    o_s, o_n = _proj(orders, scale["rev"])
+    k_s, k_n = _proj(clicks, scale["clicks"])
+    base_cost, base_rev = cost.sum(axis=0), rev.sum(axis=0)
+
+    frames = []
+    for seg, c, r, o, k, bc, br in [
+        ("전체", c_s + c_n, r_s + r_n, o_s + o_n, k_s + k_n, base_cost.sum(), base_rev.sum()),
+        ("검색", c_s, r_s, o_s, k_s, base_cost[1], base_rev[1]),
+        ("비검색", c_n, r_n, o_n, k_n, base_cost[0], base_rev[0]),
+    ]:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            frames.append(pd.DataFrame({
+                "시나리오": [sc.name for sc in scenarios],
+                "영역": seg,
+                "주문": o.round(0).astype(np.int64),
+                "매출": r.round(0).astype(np.int64),
+                "광고비": c.round(0).astype(np.int64),
+                "ROAS": np.where(c > 0, r / c * 100, 0.0).round(2),
+                "평균 CPC": np.where(k > 0, c / k, 0.0).round(2),
+                "광고비 변화(%)": np.where(bc > 0, (c / bc - 1) * 100, 0.0).round(2),
+                "매출 변화(%)": np.where(br > 0, (r / br - 1) * 100, 0.0).round(2),
+            }))
+    return pd.concat(frames, ignore_index=True)
 
 # ===================== 일자별 최대 CPC 차트 =====================
 def _plot_daily_max_cpc(df: pd.DataFrame, search_avg_cpc: float = 0.0) -> None:
     """검색 영역의 일자별 최대 CPC를 막대 그래프로 표시."""
     # 검색 영역 & 키워드 있는 행 & 클릭수 > 0
-    search = df[
+    m = (
         (df["surface"] == SURF_SEARCH_VALUE) &
         (df["keyword"] != "-") &
         (df["clicks"] > 0)
-    ].copy()
+    )
 
-    if search.empty:
+    if not m.any():
         st.caption("검색 영역 데이터가 없어 일자별 최대 CPC를 표시할 수 없습니다.")
         return
 
-    search["cpc_row"] = search["cost"] / search["clicks"]
+    cpc_row = df.loc[m, "cost"] / df.loc[m, "clicks"]
 
     daily = (
-        search.groupby("date")["cpc_row"]
+        cpc_row.groupby(df.loc[m, "date"], observed=True)
         .max()
+        .rename("cpc_row")
         .reset_index()
         .sort_values("date")
     )
@@ -303,6 +1111,14 @@ def _plot_daily_max_cpc(df: pd.DataFrame, search_avg_cpc: float = 0.0) -> None:
     dates = [str(d) for d in daily["date"]]
     cpc_vals = daily["cpc_row"].round(0).astype(int).tolist()
     avg_cpc = int(round(search_avg_cpc)) if search_avg_cpc > 0 else int(round(float(daily["cpc_row"].mean())))
+    fig = _session_cached(
+        "daily_max_cpc:" + _array_fingerprint(np.array(dates, dtype=object), np.array(cpc_vals), avg_cpc),
+        lambda: _build_daily_max_cpc_fig(dates, cpc_vals, avg_cpc),
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption("🔵 평균 이하 · 🔴 평균 초과")
+
+def _build_daily_max_cpc_fig(dates: List[str], cpc_vals: List[int], avg_cpc: int) -> go.Figure:
 
     # 색상: 평균 초과 → 연한 빨강, 이하 → 연한 파랑
     bar_colors = [
@@ -341,15 +1157,114 @@ def _plot_daily_max_cpc(df: pd.DataFrame, search_avg_cpc: float = 0.0) -> None:
         showlegend=False,
         bargap=0.3,
     )
-    st.plotly_chart(fig, use_container_width=True)
-    st.caption("🔵 평균 이하 · 🔴 평균 초과")
+    return fig
+
+
+# ===================== 키워드 추세(롤링) =====================
+def _kw_day_layout(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    (키워드, 일자) 단위 합계를 키워드코드*(일수+1)+일자인덱스 정수 키로 정렬한 레이아웃.
+    누적합(cum)에서 윈도우 합 = cum[현재] - cum[윈도우 시작 직전 키]로 구한다.
+    """
+    codes, uniques = pd.factorize(df["keyword"], sort=False)
+    days = pd.to_datetime(df["date"]).to_numpy().astype("datetime64[D]")
+    d0 = days.min()
+    day_idx = (days - d0).astype(np.int64)
+    n_days = int(day_idx.max()) + 1
+    stride = n_days + 1
+    keys, inv = np.unique(codes.astype(np.int64) * stride + day_idx, return_inverse=True)
+    cum = np.zeros((len(keys) + 1, len(HIST_METRIC_COLS)), dtype=np.float64)
+    for j, c in enumerate(HIST_METRIC_COLS):
+        cum[1:, j] = np.bincount(inv, weights=df[c].to_numpy(np.float64), minlength=len(keys))
+    np.cumsum(cum, axis=0, out=cum)
+    return {"keys": keys, "cum": cum, "stride": stride, "n_days": n_days, "d0": d0, "uniques": uniques}
+
+def _window_sums(layout: Dict[str, Any], end_keys: np.ndarray, window: int) -> np.ndarray:
+    """end_keys(포함)로 끝나는 window일 합계. 키워드 경계 밖은 -1일로 막아 이전 키워드가 섞이지 않게 한다."""
+    keys, cum, stride = layout["keys"], layout["cum"], layout["stride"]
+    kw_base = (end_keys // stride) * stride
+    start_keys = np.maximum(end_keys - window, kw_base - 1)
+    hi = np.searchsorted(keys, end_keys, side="right")
+    lo = np.searchsorted(keys, start_keys, side="right")
+    return cum[hi] - cum[lo]
+
+def _window_ratios(sums: np.ndarray, suffix: str) -> Dict[str, np.ndarray]:
+    imp, clk, cost, _, rev = (sums[:, j] for j in range(len(HIST_METRIC_COLS)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            f"spend_{suffix}": cost,
+            f"ctr_{suffix}": np.where(imp > 0, clk / imp, 0.0).round(6),
+            f"cpc_{suffix}": np.where(clk > 0, cost / clk, 0.0).round(2),
+            f"roas_{suffix}": np.where(cost > 0, rev / cost * 100, 0.0).round(2),
+        }
 
+def _keyword_trends(df: pd.DataFrame, windows: Iterable[int] = TREND_WINDOWS) -> pd.DataFrame:
+    """데이터가 있는 (키워드, 일자)마다 각 윈도우의 spend/CTR/CPC/ROAS(일자 기준 롤링)."""
+    if df.empty:
+        return pd.DataFrame()
+    layout = _kw_day_layout(df)
+    keys, stride = layout["keys"], layout["stride"]
+    out: Dict[str, Any] = {
+        "keyword": np.asarray(layout["uniques"])[keys // stride],
+        "date": layout["d0"] + (keys % stride).astype("timedelta64[D]"),
+    }
+    for w in windows:
+        out.update(_window_ratios(_window_sums(layout, keys, int(w)), f"{int(w)}d"))
+    res = pd.DataFrame(out)
+    res["date"] = res["date"].dt.date
+    return res
+
+def _trend_flags(
+    df: pd.DataFrame,
+    short: int = 7,
+    long: int = 28,
+    cpc_up_pct: float = 30.0,
+    roas_drop_pct: float = 30.0,
+    min_clicks: int = 10,
+) -> pd.DataFrame:
+    """
+    리포트 마지막 날 기준 단기/장기 윈도우 비교.
+    - CPC 상승: cpc_short가 cpc_long보다 cpc_up_pct% 이상 높음
+    - ROAS 하락: roas_short가 roas_long보다 roas_drop_pct% 이상 낮음
+    단기 클릭 min_clicks 미만 키워드는 판단하지 않는다.
+    """
+    if df.empty:
+        return pd.DataFrame()
+    layout = _kw_day_layout(df)
+    n_kw = len(layout["uniques"])
+    end_keys = np.arange(n_kw, dtype=np.int64) * layout["stride"] + (layout["n_days"] - 1)
+    s_sum = _window_sums(layout, end_keys, int(short))
+    l_sum = _window_sums(layout, end_keys, int(long))
+    res = pd.DataFrame({"keyword": np.asarray(layout["uniques"])})
+    for k, v in {**_window_ratios(s_sum, f"{short}d"), **_window_ratios(l_sum, f"{long}d")}.items():
+        res[k] = v
+    enough = s_sum[:, HIST_METRIC_COLS.index("clicks")] >= int(min_clicks)
+    cpc_s, cpc_l = res[f"cpc_{short}d"].to_numpy(), res[f"cpc_{long}d"].to_numpy()
+    roas_s, roas_l = res[f"roas_{short}d"].to_numpy(), res[f"roas_{long}d"].to_numpy()
+    res["cpc_up"] = enough & (cpc_l > 0) & (cpc_s >= cpc_l * (1 + cpc_up_pct / 100))
+    res["roas_down"] = enough & (roas_l > 0) & (roas_s <= roas_l * (1 - roas_drop_pct / 100))
+    return res[res["cpc_up"] | res["roas_down"]].sort_values(f"spend_{short}d", ascending=False).reset_index(drop=True)
 
 # ===================== 메인 탭 =====================
-def render_ad_analysis_tab(supabase: Any | None = None) -> None:
+def render_ad_analysis_tab(supabase: Any | None = None, product_index: ProductNameIndex | None = None) -> None:
     st.subheader("광고분석 (총 14일 기준)")
 
-    up = st.file_uploader("로우데이터 업로드 (xlsx/csv)", type=["xlsx", "csv"], key="ad_up")
+    source = st.radio("데이터 소스", ["파일 업로드", "저장된 이력"], horizontal=True, key="ad_source")
+    up = None
+    hist_range: Tuple[datetime.date, ...] = ()
+    stream_mode = False
+    if source == "파일 업로드":
+        up = st.file_uploader("로우데이터 업로드 (xlsx/csv)", type=["xlsx", "csv"], key="ad_up")
+        stream_mode = st.checkbox(
+            "대용량 모드 (청크 집계)", value=False, key="ad_stream",
+            help="파일을 나눠 읽어 키워드 집계만 수행합니다. 일자별 차트·추세·이력 저장은 생략됩니다.",
+        )
+    else:
+        bounds = _history_bounds()
+        if bounds is None:
+            st.info("저장된 이력이 없습니다. 파일을 업로드해 분석하면 자동 저장됩니다.")
+            return
+        hist_range = st.date_input("조회 기간", value=bounds, key="ad_hist_range")
     breakeven_roas = st.number_input("손익분기 ROAS", min_value=0.0, value=0.0, step=10.0, key="ad_be")
 
     if "ad_run_started" not in st.session_state:
@@ -359,21 +1274,57 @@ def render_ad_analysis_tab(supabase: Any | None = None) -> None:
     if not st.session_state["ad_run_started"]:
         return
 
-    if up is None:
+    if source == "파일 업로드" and up is None:
         st.error("파일을 업로드하세요.")
         return
-    try:
-        df_raw = _load_df(up)
-        df = _normalize(df_raw)
-    except ValueError as e:
-        st.error(str(e))
+    if source == "저장된 이력" and len(hist_range) != 2:
+        st.error("조회 기간(시작~종료)을 선택하세요.")
         return
-    if df.empty:
+    # 세션 캐시용 데이터 키: 업로드는 파일 내용 해시, 이력은 조회 기간 + 적재 목록
+    # (이름·크기가 같은 다른 파일이나 새로 적재된 이력이 이전 결과를 재사용하지 않게)
+    data_key = (
+        hashlib.sha256(up.getbuffer()).hexdigest() if up is not None
+        else (str(hist_range[0]), str(hist_range[1]), tuple(sorted(_history_manifest()))),
+        None if product_index is None else hash(product_index.names),
+    )
+
+    df: pd.DataFrame | None = None
+    stream_results: Dict[str, Tuple[pd.DataFrame, Dict[str, Any]]] = {}
+    if source == "파일 업로드" and stream_mode:
+        cached = st.session_state.get("ad_stream_cache")
+        if cached is not None and cached[0] == data_key:
+            stream_results = cached[1]
+        else:
+            try:
+                with st.spinner("청크 단위로 집계 중..."):
+                    stream_results = _aggregate_kw_stream(_iter_raw_chunks(up), product_index)
+            except ValueError as e:
+                st.error(str(e))
+                return
+            st.session_state["ad_stream_cache"] = (data_key, stream_results)
+        if not stream_results:
+            st.error("유효한 데이터가 없습니다.")
+            return
+    elif source == "파일 업로드":
+        try:
+            df = _normalize(_load_df(up), product_index)
+        except ValueError as e:
+            st.error(str(e))
+            return
+        try:
+            added = _history_ingest(df, up.getvalue(), up.name)
+            if added:
+                st.caption(f"이력 저장소에 {added:,}행 저장")
+        except OSError as e:
+            st.warning(f"이력 저장 실패: {e}")
+    else:
+        df = _history_load(hist_range[0], hist_range[1])
+    if df is not None and df.empty:
         st.error("유효한 데이터가 없습니다.")
         return
 
     # ===================== 상품 선택 =====================
-    products = sorted(df["product"].unique().tolist())
+    products = sorted(stream_results) if df is None else sorted(df["product"].unique().tolist())
 
     prev_product = st.session_state.get("ad_selected_product", None)
     selected_product = st.selectbox("상품 선택", products, key="ad_selected_product")
@@ -383,22 +1334,25 @@ def render_ad_analysis_tab(supabase: Any | None = None) -> None:
         st.session_state.pop("manual_bottom", None)
         st.session_state.pop("manual_top", None)
 
-    df = df[df["product"] == selected_product].copy()
-    if df.empty:
-        st.error("선택한 상품의 데이터가 없습니다.")
-        return
-
-    kw, totals = _aggregate_kw(df)
+    df_all = df
+    if df is None:
+        kw, totals = stream_results[selected_product]
+    else:
+        df = df[df["product"] == selected_product].copy()
+        if df.empty:
+            st.error("선택한 상품의 데이터가 없습니다.")
+            return
+        kw, totals = _aggregate_kw(df)
 
     st.markdown("### 1) 기본 성과 지표")
     st.caption(f"기간: {totals['date_min']} ~ {totals['date_max']}")
     total_cost = totals["total_cost"]; total_rev = totals["total_rev"]; total_orders = totals["total_orders"]
 
-    def _row(name: str, sub: pd.DataFrame) -> Dict[str, float | int | str]:
-        c = int(sub["cost"].sum()); 
-        r = int(sub["revenue_14d"].sum()); 
-        o = int(sub["orders_14d"].sum()); 
-        clicks = int(sub[CLK_COL].sum())
+    def _row(name: str, sub: pd.Series) -> Dict[str, float | int | str]:
+        c = int(sub["cost"]); 
+        r = int(sub["revenue_14d"]); 
+        o = int(sub["orders_14d"]); 
+        clicks = int(sub["clicks"])
         return {
             "영역": name,
             "주문": o,
@@ -408,12 +1362,22 @@ def render_ad_analysis_tab(supabase: Any | None = None) -> None:
             "평균 CPC": round(_safe_div(c, clicks), 2),
         }
 
+    # 지면별 합계 한 번으로 전체/검색/비검색과 지면별 행을 모두 만든다
+    by_surface = totals["by_surface"]
+    is_search = by_surface.index == SURF_SEARCH_VALUE
     rows = [
-        _row("전체", df),
-        _row("검색", df[df["surface"] == SURF_SEARCH_VALUE]),
-        _row("비검색", df[df["surface"] != SURF_SEARCH_VALUE]),
+        _row("전체", by_surface.sum()),
+        _row("검색", by_surface[is_search].sum()),
+        _row("비검색", by_surface[~is_search].sum()),
     ]
     st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    with st.expander(f"지면별 성과 ({len(by_surface)}개 지면)", expanded=False):
+        st.dataframe(pd.DataFrame([_row(s, r) for s, r in by_surface.iterrows()]),
+                     use_container_width=True, hide_index=True)
+        pivot = _surface_pivot(kw)
+        top_kw = pivot["cost"].sum(axis=1).nlargest(200).index
+        st.caption("키워드 × 지면 광고비/매출 (광고비 상위 200개)")
+        st.dataframe(pivot.loc[top_kw], use_container_width=True)
 
     st.markdown("### 2) CPC-누적매출 비중")
     conv = kw[(kw["orders_14d"] > 0) & (kw["cpc"].notna())].copy()
@@ -437,6 +1401,36 @@ def render_ad_analysis_tab(supabase: Any | None = None) -> None:
     if "manual_top" not in st.session_state:
         st.session_state["manual_top"] = float(cpc_max)
 
+    # ---- 컷 분석 지면(기본: 검색 영역) ----
+    conv_present = set(conv["surface"].astype(str).unique())
+    conv_surfaces = [s for s in by_surface.index if s in conv_present]
+    default_surface = SURF_SEARCH_VALUE if SURF_SEARCH_VALUE in conv_surfaces else conv_surfaces[0]
+    if st.session_state.get("ad_cut_surface") not in conv_surfaces:
+        st.session_state["ad_cut_surface"] = default_surface
+    cut_surface = st.selectbox("컷 분석 지면", conv_surfaces, key="ad_cut_surface")
+    surf_label = "검색" if cut_surface == SURF_SEARCH_VALUE else cut_surface
+
+    # ---- 자동 추천 컷 ----
+    rec = _recommend_cuts(kw, breakeven_roas=float(breakeven_roas), surface=cut_surface)
+    if rec["best"].empty:
+        st.caption("추천 컷 없음: 어떤 컷도 예상 이익을 늘리지 않습니다(손익분기 ROAS 기준).")
+    else:
+        best = rec["best"].iloc[0]
+        rc1, rc2 = st.columns([3, 1])
+        with rc1:
+            st.caption(
+                f"추천 컷: bottom {best['bottom']:.0f}원 / top {best['top']:.0f}원 · "
+                f"{surf_label} 광고비 절감 {best['cost_saved_pct']:.2f}% / {surf_label} 매출 유지 {best['rev_kept_pct']:.2f}% · "
+                f"예상 이익 +{best['score']:,.0f}원"
+            )
+        with rc2:
+            if st.button("추천 컷 적용", key="ad_apply_rec_cut", use_container_width=True):
+                st.session_state["manual_bottom"] = float(max(cpc_min, min(best["bottom"], cpc_max)))
+                st.session_state["manual_top"] = float(max(cpc_min, min(best["top"], cpc_max)))
+                st.rerun()
+        with st.expander("컷 후보 파레토 프론티어", expanded=False):
+            st.dataframe(rec["pareto"], use_container_width=True, hide_index=True)
+
     c1, c2 = st.columns(2)
     with c1:
         manual_bottom = st.number_input(
@@ -466,34 +1460,129 @@ def render_ad_analysis_tab(supabase: Any | None = None) -> None:
     st.session_state["manual_top"] = float(manual_top)
 
     sel_cuts = CpcCuts(bottom=float(manual_bottom), top=float(manual_top))
-    _plot_cpc_curve_plotly_manual(kw, sel_cuts)
+    _plot_cpc_curve_plotly_manual(kw, sel_cuts, cut_surface)
 
-    shares = _search_shares_for_cuts(kw, sel_cuts)
+    shares = _search_shares_for_cuts(kw, sel_cuts, cut_surface)
     aov50 = _aov_p50(conv)
 
     st.markdown(
         f"""
 - **CPC_cut bottom:** {sel_cuts.bottom:.2f}원  
-  · 전체 매출비중 {shares['rev_share_bottom']:.2f}% / 검색 매출비중 {shares['rev_share_bottom_search']:.2f}%  
-  · 전체 광고비비중 {shares['cost_share_bottom']:.2f}% / 검색 광고비비중 {shares['cost_share_bottom_search']:.2f}%
+  · 전체 매출비중 {shares['rev_share_bottom']:.2f}% / {surf_label} 매출비중 {shares['rev_share_bottom_search']:.2f}%  
+  · 전체 광고비비중 {shares['cost_share_bottom']:.2f}% / {surf_label} 광고비비중 {shares['cost_share_bottom_search']:.2f}%
 
 - **CPC_cut top:** {sel_cuts.top:.2f}원  
-  · 전체 매출비중 {shares['rev_share_top']:.2f}% / 검색 매출비중 {shares['rev_share_top_search']:.2f}%  
-  · 전체 광고비비중 {shares['cost_share_top']:.2f}% / 검색 광고비비중 {shares['cost_share_top_search']:.2f}%
+  · 전체 매출비중 {shares['rev_share_top']:.2f}% / {surf_label} 매출비중 {shares['rev_share_top_search']:.2f}%  
+  · 전체 광고비비중 {shares['cost_share_top']:.2f}% / {surf_label} 광고비비중 {shares['cost_share_top_search']:.2f}%
 """
     )
 
-    st.markdown("### 2-1) 일자별 검색 최대 CPC")
-    search_df = df[df["surface"] == SURF_SEARCH_VALUE]
-    search_avg_cpc = _safe_div(int(search_df["cost"].sum()), int(search_df["clicks"].sum()))
-    _plot_daily_max_cpc(df, search_avg_cpc)
+    if df is None:
+        st.caption("대용량 모드: 일자별 최대 CPC·키워드 추세는 생략합니다.")
+    else:
+        st.markdown("### 2-1) 일자별 검색 최대 CPC")
+        search_df = df[df["surface"] == SURF_SEARCH_VALUE]
+        search_avg_cpc = _safe_div(int(search_df["cost"].sum()), int(search_df["clicks"].sum()))
+        _plot_daily_max_cpc(df, search_avg_cpc)
+
+        st.markdown("### 2-2) 키워드 추세 (7일 vs 28일)")
+        tc1, tc2 = st.columns(2)
+        with tc1:
+            cpc_up_pct = st.number_input("CPC 상승 기준 (%)", min_value=0.0, value=30.0, step=5.0, key="ad_trend_cpc")
+        with tc2:
+            roas_drop_pct = st.number_input("ROAS 하락 기준 (%)", min_value=0.0, value=30.0, step=5.0, key="ad_trend_roas")
+        flags = _trend_flags(df, cpc_up_pct=float(cpc_up_pct), roas_drop_pct=float(roas_drop_pct))
+        if flags.empty:
+            st.caption("기준을 넘는 추세 변화 키워드가 없습니다.")
+        else:
+            st.dataframe(flags.head(200), use_container_width=True, hide_index=True)
+
+        # (키워드, 일자)별 7/14/28일 롤링 표: 행 수가 많아 요청할 때만 계산
+        if st.checkbox("키워드별 일자 롤링 추세 보기", value=False, key="ad_trend_full"):
+            trends = _keyword_trends(df)
+            kw_opts = list(flags["keyword"].astype(str)) if not flags.empty else []
+            kw_opts += [k for k in kw.sort_values("cost", ascending=False)["keyword"].astype(str).head(200) if k not in set(kw_opts)]
+            pick_kw = st.selectbox("키워드", kw_opts, key="ad_trend_kw") if kw_opts else None
+            if pick_kw is not None:
+                one = trends[trends["keyword"].astype(str) == pick_kw]
+                st.dataframe(one, use_container_width=True, hide_index=True)
+            st.download_button(
+                f"롤링 추세 전체 CSV ({len(trends):,}행)",
+                data=trends.to_csv(index=False).encode("utf-8-sig"),
+                file_name="keyword_trends.csv",
+                mime="text/csv",
+                key="ad_trend_csv",
+            )
 
     st.markdown("### 3) 제외 키워드")
     exclusions = _compute_exclusions(kw, sel_cuts, aov50, float(breakeven_roas))
-    _display_table("a) CPC_cut top 이상 전환 0", exclusions["a"])
-    _display_table("b) CPC_cut bottom 이하 전환 0", exclusions["b"])
-    _display_table("c) 전환 시 손익 ROAS 미달", exclusions["c"], extra=["roas_if_1_order"])
-    _display_table("d) 손익 ROAS 미달", exclusions["d"])
+    conf_extra: Dict[str, Dict[str, np.ndarray]] = {k: {} for k in EXCL_LABELS}
+    boot_on = df is not None and st.checkbox(
+        "부트스트랩 신뢰도 계산", value=False, key="ad_boot_on",
+        help="일별 행을 재표본해 제외 구분별 신뢰도와 ROAS·AOV 신뢰구간을 붙입니다(대용량 리포트는 첫 계산에 수 초).",
+    )
+    if boot_on:
+        bc1, bc2 = st.columns(2)
+        with bc1:
+            n_boot = st.number_input("부트스트랩 반복 수", min_value=20, max_value=2000,
+                                     value=BOOT_RESAMPLES, step=20, key="ad_boot_n")
+        with bc2:
+            min_conf = st.slider("최소 신뢰도", 0.0, 1.0, 0.0, 0.05, key="ad_boot_min_conf",
+                                 help="재표본 중 제외 조건을 만족한 비율이 이 값 미만인 키워드는 목록에서 뺍니다.")
+        # 재표본은 데이터·상품·반복 수로만 캐시, 컷·손익 ROAS가 바뀌면 판정만 다시 한다
+        boot_key = (data_key, selected_product, int(n_boot))
+        cached_boot = st.session_state.get("ad_boot_cache")
+        if cached_boot is not None and cached_boot[0] == boot_key:
+            samples = cached_boot[1]
+        else:
+            with st.spinner("부트스트랩 재표본 중..."):
+                samples = _bootstrap_samples(df, kw, n_boot=int(n_boot))
+            st.session_state["ad_boot_cache"] = (boot_key, samples)
+        boot = _bootstrap_exclusions(samples, kw, sel_cuts, float(breakeven_roas), exclusions)
+        st.caption(
+            f"AOV 중앙값 {aov50:,.0f}원 ({int(BOOT_CI * 100)}% 구간 {boot['aov_lo']:,.0f} ~ {boot['aov_hi']:,.0f}원)"
+        )
+        for k in EXCL_LABELS:
+            exclusions[k] = exclusions[k] & ~(boot[k] < float(min_conf))
+            conf_extra[k] = {"confidence": boot[k], "roas_lo": boot["roas_lo"], "roas_hi": boot["roas_hi"]}
+    _display_table("a) CPC_cut top 이상 전환 0", kw, mask=exclusions["a"], extra_values=conf_extra["a"])
+    _display_table("b) CPC_cut bottom 이하 전환 0", kw, mask=exclusions["b"], extra_values=conf_extra["b"])
+    _display_table("c) 전환 시 손익 ROAS 미달", kw, extra=["roas_if_1_order"], mask=exclusions["c"],
+                   extra_values=conf_extra["c"])
+    _display_table("d) 손익 ROAS 미달", kw, mask=exclusions["d"], extra_values=conf_extra["d"])
+
+    st.markdown("#### 제외 키워드 내보내기")
+    scope = st.radio("범위", ["선택 상품", "전체 상품"], horizontal=True, key="ad_export_scope")
+    if st.button("📦 제외 키워드 번들 생성", key="ad_export_build"):
+        if scope == "선택 상품":
+            parts: Iterable[Tuple[str, Dict[str, np.ndarray]]] = [
+                (selected_product, _dedup_exclusion_keywords(kw, exclusions))
+            ]
+        else:
+            st.caption("선택 상품 외에는 기본 컷(전환 키워드 CPC 최소/최대)을 적용합니다.")
+            product_kws = (
+                ((p, r[0]) for p, r in stream_results.items()) if df_all is None else _iter_product_kw(df_all)
+            )
+            parts = _iter_product_exclusions(product_kws, float(breakeven_roas), {selected_product: sel_cuts})
+        st.download_button(
+            "ZIP 다운로드 (txt + xlsx)",
+            data=_write_exclusion_bundle(parts),
+            file_name="negative_keywords.zip",
+            mime="application/zip",
+            key="ad_export_download",
+        )
+
+    st.markdown("### 4) 제외·입찰 시나리오 시뮬레이션")
+    bid_opts = st.multiselect(
+        "남은 검색 키워드 입찰 변경 (%)", [-30, -20, -10, 0, 10, 20], default=[0], key="ad_sim_bids",
+        help=f"클릭 ∝ (1+변경률)^{SIM_CLICK_ELASTICITY}, CPC ∝ (1+변경률) 가정",
+    )
+    sim = _simulate_scenarios(kw, exclusions, _scenario_grid(bid_opts or [0]))
+    seg = st.radio("영역", ["전체", "검색", "비검색"], horizontal=True, key="ad_sim_seg")
+    st.dataframe(
+        sim[sim["영역"] == seg].sort_values("ROAS", ascending=False),
+        use_container_width=True, hide_index=True,
+    )
 
 
 
@@ -1,19 +1,26 @@
 import streamlit as st
 import json
-import os
 import pandas as pd
 import datetime
 import uuid
 import re
-import tempfile
 import csv
-from dataclasses import dataclass
-import openpyxl
+import hashlib
+from pathlib import Path
+import numpy as np
 
 from html.parser import HTMLParser
 from ad_analysis_tab import render_ad_analysis_tab
+from product_names import ProductNameIndex, base_product_name, build_product_name_index, rep_product_names
+from sourcing import (
+    S_CSV_CHUNK, S_PREVIEW_ROWS, S_RESULT_COLS, S_TOP_K,
+    SourcingCriteria, SourcingScoreWeights,
+    _s_check_criteria, _s_evict_cache, _s_filter_table, _s_iter_ingest, _s_read_cached_table,
+    _s_save_table, _s_table_from_raw, _s_table_path, _s_touch,
+    sourcing_criteria_grid, sweep_sourcing_criteria, top_sourcing_rows,
+)
 from supabase import create_client, Client
-from typing import Dict, List, Tuple
+from typing import BinaryIO, Dict, Iterable, List, Tuple
 
 st.set_page_config(page_title="간단 마진 계산기", layout="wide")
 
@@ -93,6 +100,12 @@ def _fetch_all_rows(table: str, select: str, *, batch_size: int = 1000) -> List[
     return rows
 
 
+@st.cache_data(ttl=300)
+def load_product_name_index() -> ProductNameIndex:
+    """products.product_name 정규화 인덱스(광고 리포트·판매 상품·daily_sales 조인 공용)."""
+    return build_product_name_index(r.get("product_name") for r in _fetch_all_rows("products", "product_name"))
+
+
 @st.cache_data(ttl=300)
 def load_product_qty_sales_map() -> Tuple[List[str], Dict[str, Tuple[int, int]]]:
     products = _fetch_all_rows("products", "product_name,quantity")
@@ -102,11 +115,14 @@ def load_product_qty_sales_map() -> Tuple[List[str], Dict[str, Tuple[int, int]]]
         if name:
             total_qty_map[name] = int(r.get("quantity") or 0)
 
+    # daily_sales 이름은 인덱스로 products.product_name에 맞춰 합산(미매칭은 원래 이름)
+    index = build_product_name_index(total_qty_map)
     sales = _fetch_all_rows("daily_sales", "product_name,daily_sales_qty")
     sold_qty_map: Dict[str, int] = {}
     for r in sales:
         name = r.get("product_name")
         if name:
+            name = index.canonical(name, name)
             sold_qty_map[name] = sold_qty_map.get(name, 0) + int(r.get("daily_sales_qty") or 0)
 
     names = sorted(set(total_qty_map) | set(sold_qty_map))
@@ -222,6 +238,12 @@ def won(x) -> int:
         return 0
 
 
+def won_array(x) -> np.ndarray:
+    """won()의 배열판: 같은 반올림(np.rint = round의 짝수 반올림)으로 int64 배열, 숫자가 아니면 0."""
+    v = pd.to_numeric(np.ravel(np.asarray(x, dtype=object)), errors="coerce").astype(np.float64)
+    return np.where(np.isfinite(v), np.rint(v), 0.0).astype(np.int64).reshape(np.shape(x))
+
+
 def cny_to_krw_float(cny_str: str, exchange_rate: float) -> float:
     """위안화 입력 → 원화 환산 (float 유지, 중간 라운딩 금지)"""
     try:
@@ -240,6 +262,31 @@ def cny_total_cost_krw(cny_str: str, exchange_rate: float, qty: int) -> int:
     return won(cny_to_krw_float(cny_str, exchange_rate) * int(qty))
 
 
+def margin_target_costs(sell_prices, cfg: Dict[str, float], target_margin: float = 50.0) -> pd.DataFrame:
+    """
+    간단 마진계산기(탭1) 목표 원가 공식을 판매가 배열에 한 번에 적용.
+    - 수수료 = won(판매가 × FEE_RATE% × VAT), 입출고/포장/사은품 = won(비용 × VAT)
+    - 목표원가 = max(0, won(판매가 × (1 - 목표마진율) - 고정비)), 위안 = round(목표원가 / 환율, 2)
+    금액 라운딩은 won()/won_array(), 위안은 고유 목표원가에만 round 적용.
+    """
+    vat = 1.1
+    sell = np.asarray(sell_prices, dtype=np.float64)
+    fee = won_array(sell * cfg["FEE_RATE"] / 100 * vat)
+    fixed = won(cfg["INOUT_COST"] * vat) + won(cfg["PACKAGING_COST"] * vat) + won(cfg["GIFT_COST"] * vat)
+    fixed_total = fee + fixed
+    target_cost = np.maximum(0, won_array(sell * (1 - target_margin / 100) - fixed_total))
+    rate = cfg["EXCHANGE_RATE"]
+    uniq, inv = np.unique(target_cost, return_inverse=True)
+    yuan = np.array([round(int(c) / rate, 2) for c in uniq], dtype=np.float64)[inv.ravel()]
+    return pd.DataFrame({
+        "수수료": fee,
+        "고정비 합계": fixed_total,
+        "목표원가": target_cost,
+        "목표원가(위안)": yuan,
+        "마진": sell.astype(np.int64) - (target_cost + fixed_total),
+    })
+
+
 class ParsedCampaign:
     def __init__(self, campaign_name, status, ad_cost, ad_revenue, ad_sales_qty):
         self.campaign_name = campaign_name
@@ -407,7 +454,7 @@ def parse_sold_items_from_html(html_text: str) -> dict:
         name = name_m.group(1).strip()
         rev = int(rev_m.group(1).replace(',', '').replace('원', '')) if rev_m else 0
         qty = int(qty_m.group(1).replace('개', '')) if qty_m else 0
-        bn = name.split(',')[0].strip()
+        bn = base_product_name(name)
         agg[bn]['qty'] += qty
         agg[bn]['revenue'] += rev
         agg[bn]['options'] += 1
@@ -433,7 +480,7 @@ def parse_sold_items_detail(html_text: str) -> list:
         qty = int(qty_m.group(1).replace('개', '')) if qty_m else 0
         results.append({
             'full_name': full_name,
-            'base_name': full_name.split(',')[0].strip(),
+            'base_name': base_product_name(full_name),
             'qty': qty,
             'revenue': rev,
         })
@@ -578,208 +625,13 @@ def get_date_range(period: str) -> tuple[datetime.date, datetime.date]:
 # =========================
 # 소싱툴 관련 함수
 # =========================
+# 적재/필터/스윕/점수 계산은 sourcing.py
 
-def _s_norm(s):
-    return re.sub(r"\s+", " ", str(s or "").replace("\n", " ")).strip()
-
-
-def _s_to_int(x, default=0):
-    try:
-        if x in (None, ""):
-            return default
-        return int(float(x))
-    except (TypeError, ValueError):
-        return default
-
-
-def _s_to_float(x, default=0.0):
-    try:
-        if x in (None, ""):
-            return default
-        return float(x)
-    except (TypeError, ValueError):
-        return default
-
-
-def _s_is_brand_x(v):
-    return _s_norm(v).upper() in {"X", "엑스"}
-
-
-def _s_is_shopping_o(v):
-    return _s_norm(v).upper() in {"O", "0", "오"}
-
-
-_S_MONTH_RE = re.compile(r"(?:^|[^0-9])((?:1[0-2])|(?:[1-9]))(?:[^0-9]|$)")
-
-
-def _s_extract_months(text):
-    t = _s_norm(text)
-    months = set()
-    if not t or "없음" in t:
-        return months
-    for mm in _S_MONTH_RE.findall(t):
-        try:
-            m = int(mm)
-            if 1 <= m <= 12:
-                months.add(m)
-        except ValueError:
-            continue
-    return months
-
-
-@dataclass(frozen=True)
-class SourcingCriteria:
-    min_coupang_price: int = 10_000
-    max_coupang_price: int = 30_000
-    min_coupang_avg_reviews: float = 100.0
-    max_coupang_avg_reviews: float = 500.0
-    selected_months: frozenset[int] = frozenset()
-
-
-def _s_pick_sheet(wb):
-    return "all" if "all" in wb.sheetnames else wb.sheetnames[0]
-
-
-def _s_build_cols(header_row):
-    cols = {}
-    for i, h in enumerate(header_row):
-        name = _s_norm(h)
-        if name and name not in cols:
-            cols[name] = i
-    return cols
-
-
-def _s_find_first(cols, candidates):
-    for c in candidates:
-        if c in cols:
-            return c
-    return None
-
-
-def _s_find_contains(cols, must_include, must_exclude=()):
-    for name in cols.keys():
-        if all(t in name for t in must_include) and all(t not in name for t in must_exclude):
-            return name
-    return None
-
-
-def _s_find_tokens(cols, include_all=(), exclude_any=()):
-    for name in cols.keys():
-        if exclude_any and any(x in name for x in exclude_any):
-            continue
-        if include_all and not all(x in name for x in include_all):
-            continue
-        return name
-    return None
-
-
-def parse_sourcing_xlsx_stream(xlsx_path: str, criteria: SourcingCriteria, sheet_name: str | None = None):
-    """
-    XLSX 대용량 스트리밍 파서(openpyxl read_only).
-    - 월 선택 0개: 비시즌(계절성 == '없음')
-    - 월 선택 1개 이상: 시즌(계절성 == '있음' AND 계절성 월에 선택월 포함)
-    """
-    if any((m < 1 or m > 12) for m in criteria.selected_months):
-        raise ValueError(f"selected_months must be 1..12: {sorted(criteria.selected_months)}")
-
-    wb = openpyxl.load_workbook(xlsx_path, read_only=True, data_only=True)
-    sheet = sheet_name or _s_pick_sheet(wb)
-    if sheet not in wb.sheetnames:
-        raise ValueError(f"Sheet not found: {sheet}, available={wb.sheetnames}")
-    ws = wb[sheet]
-
-    it = ws.iter_rows(values_only=True)
-    header = next(it)
-    cols = _s_build_cols(header)
-
-    col_keyword = _s_find_first(cols, ["키워드"])
-    if not col_keyword:
-        raise ValueError("Required column missing: 키워드")
-
-    col_brand = _s_find_contains(cols, ["브랜드", "키워드"])
-    col_shopping = _s_find_contains(cols, ["쇼핑성", "키워드"])
-    col_cp_price = _s_find_tokens(cols, include_all=["쿠팡", "평균가"])
-    col_cp_avg_reviews = _s_find_tokens(cols, include_all=["쿠팡", "평균리뷰수"])
-    col_cp_total_reviews = _s_find_tokens(cols, include_all=["쿠팡", "총리뷰수"])
-    col_cp_exposed_products = _s_find_tokens(cols, include_all=["쿠팡", "노출상품수"])
-    col_last_year_total = _s_find_tokens(cols, include_all=["작년", "검색량"], exclude_any=["최대"])
-    col_last_year_max_month = _s_find_tokens(cols, include_all=["작년", "최대", "검색", "월"], exclude_any=["검색량"])
-    col_last_year_max_month_volume = _s_find_tokens(cols, include_all=["작년", "최대", "검색", "월", "검색량"])
-    col_seasonality = _s_find_first(cols, ["계절성"])
-    col_seasonality_month = _s_find_tokens(cols, include_all=["계절성", "월"])
-
-    offseason_mode = not criteria.selected_months
-
-    def get(row, col_name):
-        if not col_name:
-            return None
-        idx = cols.get(col_name)
-        return row[idx] if idx is not None and idx < len(row) else None
-
-    def coupang_avg_reviews(row):
-        v = get(row, col_cp_avg_reviews)
-        if v not in (None, ""):
-            return _s_to_float(v, 0.0)
-        total = _s_to_float(get(row, col_cp_total_reviews), 0.0)
-        denom = _s_to_float(get(row, col_cp_exposed_products), 0.0)
-        return (total / denom) if denom > 0 else 0.0
-
-    def seasonality_pass(row):
-        s = _s_norm(get(row, col_seasonality))
-        if not s:
-            return False
-        if "없음" in s:
-            return offseason_mode
-        if "있음" in s or s.upper() in {"O", "Y", "YES", "TRUE"}:
-            if offseason_mode:
-                return False
-            months = _s_extract_months(get(row, col_seasonality_month))
-            if not months:
-                return False
-            return bool(months.intersection(criteria.selected_months))
-        return False
-
-    def last_year_max_month(row):
-        m = int(float(get(row, col_last_year_max_month) or 0))
-        if not (1 <= m <= 12):
-            raise ValueError(f"Invalid last-year max month: {m}")
-        return m
-
-    results = []
-    seen = set()
-
-    for row in it:
-        keyword = _s_norm(get(row, col_keyword))
-        if not keyword or keyword in seen:
-            continue
-        seen.add(keyword)
-
-        if col_brand and not _s_is_brand_x(get(row, col_brand)):
-            continue
-        if col_shopping and not _s_is_shopping_o(get(row, col_shopping)):
-            continue
-
-        price = _s_to_int(get(row, col_cp_price), 0) if col_cp_price else 0
-        if not (criteria.min_coupang_price <= price <= criteria.max_coupang_price):
-            continue
-
-        avg_rev = coupang_avg_reviews(row)
-        if not (criteria.min_coupang_avg_reviews <= avg_rev <= criteria.max_coupang_avg_reviews):
-            continue
-
-        if not seasonality_pass(row):
-            continue
-
-        results.append({
-            "키워드": keyword,
-            "작년 검색량": _s_to_int(get(row, col_last_year_total), 0),
-            "작년 최대검색월": last_year_max_month(row),
-            "작년최대 검색월 검색량": _s_to_int(get(row, col_last_year_max_month_volume), 0),
-            "쿠팡 평균가": price,
-            "쿠팡 평균 리뷰수": round(avg_rev, 2),
-        })
-
-    return results
+# ---- 소싱: 마진 일괄 계산 ----
+def sourcing_margin_table(rows: pd.DataFrame, cfg: Dict[str, float], target_margin: float = 50.0) -> pd.DataFrame:
+    """소싱 결과 행의 쿠팡 평균가를 판매가로 보고 목표 마진율 기준 최대 매입 원가(원/위안)를 붙인다."""
+    m = margin_target_costs(rows["쿠팡 평균가"].to_numpy(), cfg, target_margin)
+    return pd.concat([rows.reset_index(drop=True), m], axis=1)
 
 
 def _s_toggle_button(label: str, pressed: bool, key: str) -> bool:
@@ -811,31 +663,221 @@ def _s_month_selector(key: str = "sourcing_months") -> set[int]:
     return months
 
 
+def _s_parse_bands(text: str, cast) -> List[Tuple]:
+    """'10000-30000, 5000-15000' → [(10000, 30000), (5000, 15000)]."""
+    bands = []
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        lo, sep, hi = part.partition("-")
+        if not sep:
+            raise ValueError(f"구간 형식 오류(최소-최대): {part.strip()}")
+        bands.append((cast(lo.strip()), cast(hi.strip())))
+    return bands
+
+
+def _s_parse_month_sets(text: str) -> List[frozenset]:
+    """'없음 | 3,4 | 12' → [frozenset(), {3, 4}, {12}] ('없음' 또는 빈 칸 = 비시즌)."""
+    out = []
+    for part in text.split("|"):
+        part = part.strip()
+        if part in ("", "없음"):
+            out.append(frozenset())
+            continue
+        nums = re.findall(r"\d+", part)
+        if not nums:
+            raise ValueError(f"월 형식 오류: {part}")
+        out.append(frozenset(int(n) for n in nums))
+    return out
+
+
+def _s_render_sweep(table: pd.DataFrame, crit: SourcingCriteria) -> None:
+    with st.expander("🔀 조건 스윕 (여러 조건 조합 한 번에 비교)"):
+        c1, c2, c3 = st.columns(3)
+        p_text = c1.text_input("가격 구간", value=f"{crit.min_coupang_price}-{crit.max_coupang_price}", key="sourcing_sweep_price")
+        r_text = c2.text_input("리뷰수 구간", value=f"{crit.min_coupang_avg_reviews:g}-{crit.max_coupang_avg_reviews:g}", key="sourcing_sweep_rev")
+        m_text = c3.text_input("월 집합 ('|' 구분, 없음=비시즌)", value="없음", key="sourcing_sweep_months")
+        try:
+            grid = sourcing_criteria_grid(
+                _s_parse_bands(p_text, int), _s_parse_bands(r_text, float), _s_parse_month_sets(m_text),
+            )
+            res = sweep_sourcing_criteria(table, grid)
+        except ValueError as e:
+            st.error(str(e))
+            return
+        summary = pd.DataFrame([{
+            "가격": f"{r.criteria.min_coupang_price:,}~{r.criteria.max_coupang_price:,}",
+            "리뷰수": f"{r.criteria.min_coupang_avg_reviews:g}~{r.criteria.max_coupang_avg_reviews:g}",
+            "월": ",".join(map(str, sorted(r.criteria.selected_months))) or "비시즌",
+            "통과 키워드": r.count,
+        } for r in res])
+        st.dataframe(summary, use_container_width=True)
+        pick = st.selectbox("키워드 보기", range(len(res)), format_func=lambda i: " / ".join(map(str, summary.iloc[i, :3])), key="sourcing_sweep_pick")
+        if pick is not None:
+            st.write(", ".join(res[pick].keywords[:S_PREVIEW_ROWS]) or "(없음)")
+
+
+def _s_render_ranking(df: pd.DataFrame) -> None:
+    with st.expander("🏆 기회 점수 상위 키워드"):
+        d = SourcingScoreWeights()
+        c = st.columns(5)
+        weights = SourcingScoreWeights(
+            search=c[0].number_input("작년 검색량", value=d.search, step=0.05, key="sourcing_w_search"),
+            peak=c[1].number_input("최대월 검색량", value=d.peak, step=0.05, key="sourcing_w_peak"),
+            price=c[2].number_input("평균가", value=d.price, step=0.05, key="sourcing_w_price"),
+            reviews=c[3].number_input("리뷰 적음", value=d.reviews, step=0.05, key="sourcing_w_reviews"),
+        )
+        k = c[4].number_input("상위 K", min_value=1, value=S_TOP_K, step=10, key="sourcing_top_k")
+        st.dataframe(top_sourcing_rows(df, int(k), weights), use_container_width=True)
+
+
+def _s_criteria_digest(criteria: SourcingCriteria) -> str:
+    key = (
+        criteria.min_coupang_price, criteria.max_coupang_price,
+        criteria.min_coupang_avg_reviews, criteria.max_coupang_avg_reviews,
+        tuple(sorted(criteria.selected_months)),
+    )
+    return hashlib.sha1(repr(key).encode()).hexdigest()[:12]
+
+
+def _s_write_csv(frames: Iterable[pd.DataFrame], path: Path) -> Path:
+    """결과 조각을 차례로 CSV에 이어 쓴다(utf-8-sig, 헤더 1회). 끝까지 쓴 경우에만 path로 확정."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".part")
+    with open(tmp, "w", encoding="utf-8-sig", newline="") as fh:
+        pd.DataFrame(columns=S_RESULT_COLS).to_csv(fh, index=False)
+        for frame in frames:
+            frame.to_csv(fh, header=False, index=False)
+    tmp.replace(path)
+    _s_evict_cache(path.parent, keep=[path])
+    return path
+
+
+def _s_ingest_with_progress(src: BinaryIO, table_path: Path, csv_path: Path, criteria: SourcingCriteria) -> pd.DataFrame:
+    """
+    배치마다 진행률·부분 결과를 갱신하면서 적재(src: 업로드 버퍼를 복사 없이 그대로). 통과 행은 CSV에 바로 이어 쓴다.
+    중지 버튼(또는 다른 위젯 조작)으로 Streamlit이 재실행되면 루프가 끊기고,
+    부분 결과는 세션에 남으며 CSV는 확정되지 않는다.
+    """
+    _s_check_criteria(criteria)
+    st.button("⏹ 중지", key="sourcing_cancel")
+    bar = st.progress(0.0, text="엑셀 적재 준비 중...")
+    preview = st.empty()
+    chunks: List[pd.DataFrame] = []
+    shown: List[pd.DataFrame] = []
+    n_shown = matched = 0
+
+    def _batches():
+        nonlocal n_shown, matched
+        src.seek(0)
+        for scanned, total, chunk in _s_iter_ingest(src, "all"):
+            chunks.append(chunk)
+            rows = _s_filter_table(chunk, criteria)
+            yield rows
+            matched += len(rows)
+            if n_shown < S_PREVIEW_ROWS and len(rows):
+                shown.append(rows.head(S_PREVIEW_ROWS - n_shown))
+                n_shown += len(shown[-1])
+                preview.dataframe(pd.concat(shown, ignore_index=True), use_container_width=True)
+            frac = min(scanned / total, 1.0) if total else 0.0
+            bar.progress(frac, text=f"{scanned:,}행 읽음{f' / {total:,}' if total else ''} · 통과 {matched:,}개")
+            st.session_state["sourcing_partial"] = (scanned, total, shown)
+
+    try:
+        _s_write_csv(_batches(), csv_path)
+    except ValueError:
+        # 데이터 오류는 호출부가 표시(부분 결과는 중지로 끊긴 경우에만 남긴다)
+        bar.empty()
+        preview.empty()
+        st.session_state.pop("sourcing_partial", None)
+        raise
+    bar.empty()
+    preview.empty()
+    st.session_state.pop("sourcing_partial", None)
+    table = pd.concat(chunks, ignore_index=True) if chunks else _s_table_from_raw([], {})
+    _s_save_table(table, table_path)
+    return table
+
+
 def render_sourcing_tab():
     st.subheader("🧰 소싱툴 (엑셀 파싱)")
 
     months = _s_month_selector()
+    default = SourcingCriteria()
+    c1, c2, c3, c4 = st.columns(4)
+    min_price = c1.number_input("쿠팡 평균가 최소", min_value=0, value=default.min_coupang_price, step=1000, key="sourcing_min_price")
+    max_price = c2.number_input("쿠팡 평균가 최대", min_value=0, value=default.max_coupang_price, step=1000, key="sourcing_max_price")
+    min_rev = c3.number_input("평균 리뷰수 최소", min_value=0.0, value=default.min_coupang_avg_reviews, step=10.0, key="sourcing_min_rev")
+    max_rev = c4.number_input("평균 리뷰수 최대", min_value=0.0, value=default.max_coupang_avg_reviews, step=10.0, key="sourcing_max_rev")
     uploaded = st.file_uploader("엑셀 업로드(.xlsx)", type=["xlsx"], key="sourcing_xlsx_uploader")
 
+    crit = SourcingCriteria(
+        min_coupang_price=int(min_price),
+        max_coupang_price=int(max_price),
+        min_coupang_avg_reviews=float(min_rev),
+        max_coupang_avg_reviews=float(max_rev),
+        selected_months=frozenset(months),
+    )
+
+    # 업로드 버퍼를 복사하지 않고 내용 해시(임시 파일 없음). 적재 테이블은 이 경로(내용 해시)로 식별한다
+    table_path = None
+    if uploaded is not None:
+        with uploaded.getbuffer() as buf:
+            table_path = _s_table_path(buf, "all")
+
+    # 파싱은 파일당 1회(해시 캐시), 조건 변경은 적재된 테이블에 마스크만 다시 적용
     if st.button("파싱 실행", type="primary", key="sourcing_run"):
         if uploaded is None:
             st.warning("파일 업로드가 필요합니다.")
             st.stop()
+        table = _s_read_cached_table(table_path)
+        if table is None:
+            csv_path = table_path.with_name(f"{table_path.stem}-{_s_criteria_digest(crit)}.csv")
+            try:
+                table = _s_ingest_with_progress(uploaded, table_path, csv_path, crit)
+            except ValueError as e:
+                st.error(str(e))
+                return
+        st.session_state["sourcing_table"] = (table_path, table)
+
+    # 적재가 끝나기 전에 재실행됐으면(중지 등) 그때까지의 부분 결과만 보여 준다
+    partial = st.session_state.get("sourcing_partial")
+    if partial is not None:
+        scanned, total, shown = partial
+        st.warning(f"중지됨: {scanned:,}행{f' / {total:,}행' if total else ''}까지 읽었습니다. 다시 실행하면 처음부터 적재합니다.")
+        if shown:
+            st.dataframe(pd.concat(shown, ignore_index=True), use_container_width=True)
+        st.session_state.pop("sourcing_partial", None)
+
+    # 이름·크기가 같아도 내용이 다른 파일이면 이전 테이블을 쓰지 않는다
+    loaded = st.session_state.get("sourcing_table")
+    if loaded is None or table_path is None or loaded[0] != table_path:
+        return
+    table = loaded[1]
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp:
-            tmp.write(uploaded.getbuffer())
-            xlsx_path = tmp.name
-
-        crit = SourcingCriteria(selected_months=frozenset(months))
-        rows = parse_sourcing_xlsx_stream(xlsx_path, criteria=crit, sheet_name="all")
-
-        st.success(f"완료: {len(rows)} rows")
-        st.dataframe(rows, use_container_width=True)
-
-        df = pd.DataFrame(rows)
+    try:
+        df = _s_filter_table(table, crit)
+    except ValueError as e:
+        st.error(str(e))
+        return
+
+    st.success(f"완료: {len(df)} rows (전체 키워드 {len(table):,}개)")
+    st.dataframe(df.head(S_PREVIEW_ROWS * 5), use_container_width=True)
+    _s_render_ranking(df)
+    with st.expander("💰 마진 일괄 계산 (쿠팡 평균가 판매 · 마진율 50% 기준)"):
+        st.caption("탭1 간단 마진계산기와 같은 공식·설정값(수수료율, 입출고/포장/사은품 비용, 환율)")
+        st.dataframe(sourcing_margin_table(df, config), use_container_width=True)
+    _s_render_sweep(table, crit)
+    # CSV는 조건별 파일로 조각 단위 기록(적재 중 이미 쓴 파일이 있으면 재사용)
+    csv_path = table_path.with_name(f"{table_path.stem}-{_s_criteria_digest(crit)}.csv")
+    if csv_path.exists():
+        _s_touch(csv_path)
+    else:
+        _s_write_csv((df.iloc[i:i + S_CSV_CHUNK] for i in range(0, len(df), S_CSV_CHUNK)), csv_path)
+    with open(csv_path, "rb") as fh:
         st.download_button(
             "CSV 다운로드",
-            data=df.to_csv(index=False).encode("utf-8-sig"),
+            data=fh,
             file_name="sourcing_filtered.csv",
             mime="text/csv",
             key="sourcing_download",
@@ -882,16 +924,10 @@ def main():
                 try:
                     target_margin = 50.0
                     sell_price_val = safe_int(sell_price_raw)
-                    vat = 1.1
-                    fee = won((sell_price_val * config['FEE_RATE'] / 100) * vat)
-                    inout_cost = won(config['INOUT_COST'] * vat)
-                    packaging_cost = won(config['PACKAGING_COST'] * vat)
-                    gift_cost = won(config['GIFT_COST'] * vat)
-                    C_total_fixed_cost = fee + inout_cost + packaging_cost + gift_cost
-                    raw_cost2 = sell_price_val * (1 - target_margin / 100) - C_total_fixed_cost
-                    target_cost = max(0, won(raw_cost2))
-                    yuan_cost = round((target_cost / config['EXCHANGE_RATE']), 2)
-                    profit = sell_price_val - (target_cost + fee + inout_cost + packaging_cost + gift_cost)
+                    m = margin_target_costs([sell_price_val], config, target_margin).iloc[0]
+                    target_cost = int(m["목표원가"])
+                    yuan_cost = float(m["목표원가(위안)"])
+                    profit = int(m["마진"])
                     margin_display.markdown(
                         f"""
 <div style='height:10px; line-height:10px; color:#f63366; font-size:15px; margin-bottom:15px;'>
@@ -1929,7 +1965,7 @@ def main():
                 p_res = supabase.table("products").select("product_name, purchase_cost, logistics_cost, customs_duty").execute()
                 if p_res.data:
                     df_p = pd.DataFrame(p_res.data)
-                    df_p['rep_name'] = df_p['product_name'].apply(lambda x: re.sub(r'\d+차', '', str(x)).strip())
+                    df_p['rep_name'] = rep_product_names(df_p['product_name'])
 
                     p_summary = df_p.groupby('rep_name').agg({
                         'purchase_cost': 'sum',
@@ -1963,7 +1999,12 @@ def main():
     # 탭5: 광고 분석
     # ===========================
     with tab5:
-        render_ad_analysis_tab(supabase)
+        try:
+            product_index = load_product_name_index()
+        except Exception as e:
+            st.warning(f"상품명 인덱스 로드 실패(원본 상품명으로 분석): {e}")
+            product_index = None
+        render_ad_analysis_tab(supabase, product_index=product_index)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,54 @@
+"""키워드 롤링 추세 시간 측정: 90일 × 20만 키워드 정규화 프레임.
+
+실행: python benchmarks/bench_keyword_trends.py [키워드 수] [일수] [키워드당 평균 활성 일수]
+"""
+import datetime
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from ad_analysis_tab import _keyword_trends, _trend_flags  # noqa: E402
+
+
+def make_frame(n_kw: int, n_days: int, active_days: int, seed: int = 0) -> pd.DataFrame:
+    """_normalize 출력과 같은 컬럼 구성(키워드별 활성 일자를 무작위로 고른 행)."""
+    rng = np.random.default_rng(seed)
+    per_kw = rng.poisson(active_days, n_kw).clip(1, n_days)
+    kw_code = np.repeat(np.arange(n_kw), per_kw)
+    day = rng.integers(0, n_days, kw_code.size)
+    n = kw_code.size
+    d0 = datetime.date(2026, 1, 1)
+    dates = np.array([d0 + datetime.timedelta(days=int(i)) for i in range(n_days)], dtype=object)
+    clicks = rng.integers(0, 30, n).astype(np.int32)
+    return pd.DataFrame({
+        "date": dates[day],
+        "product": pd.Categorical(["P"] * n),
+        "keyword": pd.Categorical.from_codes(kw_code, [f"키워드{i}" for i in range(n_kw)]),
+        "surface": pd.Categorical(["검색 영역"] * n),
+        "impressions": (clicks * rng.integers(5, 50, n)).astype(np.int32),
+        "clicks": clicks,
+        "cost": clicks.astype(np.int64) * rng.integers(100, 2000, n),
+        "orders_14d": rng.integers(0, 3, n).astype(np.int32),
+        "revenue_14d": rng.integers(0, 80_000, n).astype(np.int64),
+    })
+
+
+def main(n_kw: int = 200_000, n_days: int = 90, active_days: int = 10) -> None:
+    df = make_frame(n_kw, n_days, active_days)
+    print(f"rows={len(df):,} keywords={n_kw:,} days={n_days}")
+    t = time.perf_counter()
+    trends = _keyword_trends(df)
+    print(f"_keyword_trends: {time.perf_counter() - t:.2f}s ({len(trends):,} (keyword, date) rows)")
+    t = time.perf_counter()
+    flags = _trend_flags(df)
+    print(f"_trend_flags:    {time.perf_counter() - t:.2f}s ({len(flags):,} flagged)")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,39 @@
+"""_longest_true_run_by_x: 벡터화 버전 vs 반복문 버전(1M 포인트 마스크).
+
+실행: python benchmarks/bench_longest_run.py [포인트 수]
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "tests"))
+
+from ad_analysis_tab import _longest_true_run_by_x  # noqa: E402
+from test_longest_run import _longest_true_run_by_x_loop  # noqa: E402
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def main(n: int = 1_000_000) -> None:
+    rng = np.random.default_rng(0)
+    x = np.sort(rng.uniform(0, 10_000, n))
+    for density in (0.1, 0.5, 0.9):
+        mask = rng.random(n) < density
+        assert _longest_true_run_by_x(mask, x) == _longest_true_run_by_x_loop(mask, x)
+        t_vec = _best_of(lambda: _longest_true_run_by_x(mask, x), 5)
+        t_loop = _best_of(lambda: _longest_true_run_by_x_loop(mask, x), 1)
+        print(f"n={n:,} density={density:.1f}  numpy {t_vec * 1000:8.2f} ms  loop {t_loop * 1000:9.1f} ms  x{t_loop / t_vec:,.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,91 @@
+# app/product_names.py
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+# ===================== 상품명 정규화 =====================
+_LOT_RE = re.compile(r"\d+차")
+_WS_RE = re.compile(r"\s+")
+
+
+def base_product_name(name: object) -> str:
+    """옵션 부분 제거: 쉼표 앞 첫 번째 값(광고집행 상품명·판매 상품명 공통)."""
+    return str(name).split(",")[0].strip()
+
+
+def rep_product_name(name: object) -> str:
+    """차수(\\d+차) 제거한 대표 상품명."""
+    return _LOT_RE.sub("", str(name)).strip()
+
+
+def _name_key(name: object) -> str:
+    """조회 키: 옵션·차수 제거 + 공백 정리."""
+    return _WS_RE.sub(" ", rep_product_name(base_product_name(name))).strip().lower()
+
+
+def _lot_no(name: str) -> int:
+    m = _LOT_RE.findall(name)
+    return int(m[-1][:-1]) if m else 0
+
+
+def _map_uniques(values: Iterable[object], fn) -> np.ndarray:
+    """문자열 변환을 고유값에만 적용하고 원래 순서로 펼친다."""
+    s = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+    codes, uniques = pd.factorize(s, use_na_sentinel=False)
+    mapped = np.array([fn(u) for u in uniques], dtype=object)
+    return mapped[codes]
+
+
+def rep_product_names(values: Iterable[object]) -> np.ndarray:
+    """rep_product_name의 배열판(고유값에만 정규식 적용)."""
+    return _map_uniques(values, rep_product_name)
+
+
+# ===================== 정규화 인덱스 =====================
+@dataclass(frozen=True)
+class ProductNameIndex:
+    """
+    원본/광고/차수 변형 상품명 → products.product_name 매핑.
+    - 정확히 같은 product_name이 있으면 그대로
+    - 없으면 옵션·차수를 뗀 키로 찾고, 같은 키의 차수 변형이 여럿이면 가장 최근 차수(번호 최대)
+    """
+    names: Tuple[str, ...]
+    exact: Dict[str, int]
+    by_key: Dict[str, int]
+
+    def code(self, raw: object) -> int:
+        """names 인덱스(없으면 -1)."""
+        if raw is None:
+            return -1
+        s = str(raw).strip()
+        i = self.exact.get(s)
+        return i if i is not None else self.by_key.get(_name_key(s), -1)
+
+    def canonical(self, raw: object, default: str | None = None) -> str | None:
+        i = self.code(raw)
+        return self.names[i] if i >= 0 else default
+
+    def codes(self, values: Iterable[object]) -> np.ndarray:
+        """배열 조회: 고유값만 사전 조회 후 정수 코드로 펼친다(-1 = 미매칭)."""
+        return _map_uniques(values, self.code).astype(np.int64)
+
+    def canonical_names(self, values: Iterable[object]) -> np.ndarray:
+        """배열판 canonical. 매칭 안 되면 옵션만 뗀 원래 이름을 유지."""
+        return _map_uniques(values, lambda u: self.canonical(u, base_product_name(u)))
+
+
+def build_product_name_index(product_names: Iterable[str]) -> ProductNameIndex:
+    names = tuple(sorted({str(n).strip() for n in product_names if n and str(n).strip()}))
+    exact = {n: i for i, n in enumerate(names)}
+    by_key: Dict[str, int] = {}
+    for i, n in enumerate(names):
+        k = _name_key(n)
+        j = by_key.get(k)
+        if j is None or _lot_no(n) > _lot_no(names[j]):
+            by_key[k] = i
+    return ProductNameIndex(names=names, exact=exact, by_key=by_key)
@@ -0,0 +1,707 @@
+# app/sourcing.py
+from __future__ import annotations
+
+import datetime
+import hashlib
+import io
+import itertools
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+import xlsx_parallel
+
+# ===================== 소싱툴: 엑셀 적재/필터/스윕/점수 =====================
+# 화면(Streamlit) 없이 쓰는 부분. 탭 UI는 app.py의 render_sourcing_tab.
+
+def _s_norm(s):
+    return re.sub(r"\s+", " ", str(s or "").replace("\n", " ")).strip()
+
+
+def _s_to_int(x, default=0):
+    try:
+        if x in (None, ""):
+            return default
+        return int(float(x))
+    except (TypeError, ValueError):
+        return default
+
+
+def _s_to_float(x, default=0.0):
+    try:
+        if x in (None, ""):
+            return default
+        return float(x)
+    except (TypeError, ValueError):
+        return default
+
+
+def _s_is_brand_x(v):
+    return _s_norm(v).upper() in {"X", "엑스"}
+
+
+def _s_is_shopping_o(v):
+    return _s_norm(v).upper() in {"O", "0", "오"}
+
+
+_S_MONTH_RE = re.compile(r"(?:^|[^0-9])((?:1[0-2])|(?:[1-9]))(?:[^0-9]|$)")
+
+
+def _s_extract_months(text):
+    t = _s_norm(text)
+    months = set()
+    if not t or "없음" in t:
+        return months
+    for mm in _S_MONTH_RE.findall(t):
+        try:
+            m = int(mm)
+            if 1 <= m <= 12:
+                months.add(m)
+        except ValueError:
+            continue
+    return months
+
+
+@dataclass(frozen=True)
+class SourcingCriteria:
+    min_coupang_price: int = 10_000
+    max_coupang_price: int = 30_000
+    min_coupang_avg_reviews: float = 100.0
+    max_coupang_avg_reviews: float = 500.0
+    selected_months: frozenset[int] = frozenset()
+
+
+def _s_check_criteria(criteria: SourcingCriteria) -> None:
+    """조건 값 검증(잘못되면 ValueError). 적재 전에 한 번 불러 시트를 읽기 전에 실패시킨다."""
+    if any((m < 1 or m > 12) for m in criteria.selected_months):
+        raise ValueError(f"selected_months must be 1..12: {sorted(criteria.selected_months)}")
+
+
+def _s_pick_sheet(wb):
+    return "all" if "all" in wb.sheetnames else wb.sheetnames[0]
+
+
+def _s_build_cols(header_row):
+    cols = {}
+    for i, h in enumerate(header_row):
+        name = _s_norm(h)
+        if name and name not in cols:
+            cols[name] = i
+    return cols
+
+
+def _s_find_first(cols, candidates):
+    for c in candidates:
+        if c in cols:
+            return c
+    return None
+
+
+def _s_find_contains(cols, must_include, must_exclude=()):
+    for name in cols.keys():
+        if all(t in name for t in must_include) and all(t not in name for t in must_exclude):
+            return name
+    return None
+
+
+def _s_find_tokens(cols, include_all=(), exclude_any=()):
+    for name in cols.keys():
+        if exclude_any and any(x in name for x in exclude_any):
+            continue
+        if include_all and not all(x in name for x in include_all):
+            continue
+        return name
+    return None
+
+
+# ---- 소싱: 1회 적재 후 반복 필터 ----
+SOURCING_CACHE_DIR = "sourcing_cache"
+# 캐시(테이블 parquet·결과 CSV) 총량 상한, 넘으면 오래 안 쓴 파일부터 삭제
+S_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# 중단된 적재가 남긴 .part/.tmp는 이 시간이 지나면 정리
+S_CACHE_STALE_SECONDS = 3600
+# 이 크기 이상 xlsx는 병렬 XML 리더로 적재
+S_PARALLEL_MIN_BYTES = 32 * 1024 * 1024
+# 병렬 XML 리더 워커 프로세스 수 상한(Streamlit 서버 프로세스 안에서 띄우므로 코어 수와 무관하게 제한)
+S_PARALLEL_MAX_WORKERS = 4
+# 병렬 적재는 서버 전체에서 한 번에 하나만(동시 업로드는 openpyxl로 읽어 워커 수가 곱해지지 않게)
+_S_PARALLEL_SLOT = threading.Lock()
+# 스트리밍 배치 행 수 / 화면 미리보기 행 수 / CSV 쓰기 단위
+S_STREAM_BATCH = 20_000
+S_PREVIEW_ROWS = 200
+S_CSV_CHUNK = 50_000
+S_RESULT_COLS = ["키워드", "작년 검색량", "작년 최대검색월", "작년최대 검색월 검색량", "쿠팡 평균가", "쿠팡 평균 리뷰수"]
+S_TABLE_COLS = [
+    "키워드", "brand_ok", "shopping_ok", "price", "avg_reviews",
+    "season_state", "month_mask", "ly_total", "ly_max_month", "ly_max_month_volume",
+]
+# season_state: 0=판정 불가(빈 값 등), 1=없음(비시즌), 2=있음(시즌)
+S_SEASON_NONE = 1
+S_SEASON_HAS = 2
+
+
+def _s_season_state(v) -> int:
+    """parse_sourcing_xlsx_stream.seasonality_pass의 분기를 정수 상태로."""
+    s = _s_norm(v)
+    if not s:
+        return 0
+    if "없음" in s:
+        return S_SEASON_NONE
+    if "있음" in s or s.upper() in {"O", "Y", "YES", "TRUE"}:
+        return S_SEASON_HAS
+    return 0
+
+
+def _s_month_bits(months) -> int:
+    """월 집합 → 12비트 마스크(1월=bit0)."""
+    return sum(1 << (m - 1) for m in months)
+
+
+def _s_map_unique(values, fn, dtype):
+    """셀 값 변환을 고유값에만 적용(행마다 같은 값을 반복 변환하지 않음)."""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=False)
+    # factorize는 빈 셀(None)을 NaN으로 바꾸므로 fn에는 원래대로 None을 넘긴다
+    uniques = [None if pd.isna(u) else u for u in uniques]
+    return np.array([fn(u) for u in uniques], dtype=dtype)[codes] if len(uniques) else np.array([], dtype=dtype)
+
+
+def _s_auto_columns(cols: Dict[str, int]) -> Dict[str, int]:
+    """헤더 이름 → 적재에 쓰는 원본 컬럼 인덱스(토큰 규칙으로 자동 해석, 없는 컬럼은 빠짐)."""
+    src = {
+        "키워드": _s_find_first(cols, ["키워드"]),
+        "brand": _s_find_contains(cols, ["브랜드", "키워드"]),
+        "shopping": _s_find_contains(cols, ["쇼핑성", "키워드"]),
+        "price": _s_find_tokens(cols, include_all=["쿠팡", "평균가"]),
+        "avg_reviews": _s_find_tokens(cols, include_all=["쿠팡", "평균리뷰수"]),
+        "total_reviews": _s_find_tokens(cols, include_all=["쿠팡", "총리뷰수"]),
+        "exposed": _s_find_tokens(cols, include_all=["쿠팡", "노출상품수"]),
+        "ly_total": _s_find_tokens(cols, include_all=["작년", "검색량"], exclude_any=["최대"]),
+        "ly_max_month": _s_find_tokens(cols, include_all=["작년", "최대", "검색", "월"], exclude_any=["검색량"]),
+        "ly_max_month_volume": _s_find_tokens(cols, include_all=["작년", "최대", "검색", "월", "검색량"]),
+        "season": _s_find_first(cols, ["계절성"]),
+        "season_months": _s_find_tokens(cols, include_all=["계절성", "월"]),
+    }
+    return {k: cols[v] for k, v in src.items() if v}
+
+
+# ---- 소싱: 헤더 스키마 프로필 ----
+# 헤더 행 지문별로 해석된 컬럼 맵을 저장해 두고, 같은 양식의 파일은 토큰 탐색 없이 바로 쓴다.
+# 오버라이드 파일(JSON, 선택): 자동 해석이 틀리는 양식의 컬럼을 헤더 이름으로 직접 지정.
+#   {"default": {"price": "쿠팡 평균 판매가"}, "<헤더 지문>": {"ly_total": "전년 검색량", "exposed": null}}
+#   - "default"는 모든 파일(헤더가 없으면 무시), 지문 키는 그 양식에만(헤더가 없으면 오류)
+#   - null은 해당 컬럼을 쓰지 않음
+S_SCHEMA_FIELDS = (
+    "키워드", "brand", "shopping", "price", "avg_reviews", "total_reviews", "exposed",
+    "ly_total", "ly_max_month", "ly_max_month_volume", "season", "season_months",
+)
+S_SCHEMA_OVERRIDE_PATH = "sourcing_schema.json"
+_S_PROFILE_MEMO: Dict[Tuple[str, str], Dict[str, int]] = {}
+
+
+def _s_header_fingerprint(names: List[str]) -> str:
+    return hashlib.sha1("\x1f".join(names).encode("utf-8")).hexdigest()[:16]
+
+
+def _s_read_json(path: str | Path) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: JSON 객체가 아닙니다")
+    return data
+
+
+def _s_profile_columns(names: List[str], fp: str, profile_path: Path) -> Dict[str, int]:
+    """저장된 프로필이 있으면 그대로, 없으면 자동 해석 후 저장."""
+    memo_key = (str(profile_path), fp)
+    cols = _S_PROFILE_MEMO.get(memo_key)
+    if cols is not None:
+        return cols
+    try:
+        profiles = _s_read_json(profile_path)
+    except ValueError:
+        profiles = {}  # 깨진 캐시는 새로 만든다
+    saved = profiles.get(fp, {}).get("columns")
+    if isinstance(saved, dict) and all(k in S_SCHEMA_FIELDS and isinstance(v, int) and 0 <= v < len(names) for k, v in saved.items()):
+        cols = saved
+    else:
+        cols = _s_auto_columns(_s_build_cols(names))
+        profiles[fp] = {"headers": names, "columns": cols}
+        profile_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = profile_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(profiles, f, ensure_ascii=False, indent=1)
+        tmp.replace(profile_path)
+    _S_PROFILE_MEMO[memo_key] = cols
+    return cols
+
+
+def _s_resolve_columns(
+    header_row,
+    cache_dir: str | Path = SOURCING_CACHE_DIR,
+    override_path: str | Path = S_SCHEMA_OVERRIDE_PATH,
+) -> Dict[str, int]:
+    """헤더 행 → 컬럼 맵(프로필 캐시 + 오버라이드). 키워드 컬럼이 없으면 ValueError."""
+    names = [_s_norm(h) for h in header_row]
+    fp = _s_header_fingerprint(names)
+    cols = dict(_s_profile_columns(names, fp, Path(cache_dir) / "schema_profiles.json"))
+    overrides = _s_read_json(override_path)
+    for scope in ("default", fp):
+        for field, header in (overrides.get(scope) or {}).items():
+            if field not in S_SCHEMA_FIELDS:
+                raise ValueError(f"{override_path}: unknown field '{field}' (allowed: {', '.join(S_SCHEMA_FIELDS)})")
+            if header is None:
+                cols.pop(field, None)
+            elif _s_norm(header) in names:
+                cols[field] = names.index(_s_norm(header))
+            elif scope == fp:
+                raise ValueError(f"{override_path}: header not found for {field}: {header}")
+    if "키워드" not in cols:
+        raise ValueError("Required column missing: 키워드")
+    return cols
+
+
+def _s_table_from_raw(keywords: List[str], raw: Dict[str, list]) -> pd.DataFrame:
+    """첫 등장 키워드 행들의 원본 셀 값(raw: 컬럼별 리스트) → 타입 지정 테이블."""
+    n = len(keywords)
+    none = [None] * n
+
+    def col(k):
+        return raw.get(k, none)
+
+    avg_given = np.array([v not in (None, "") for v in col("avg_reviews")], dtype=bool)
+    total = _s_map_unique(col("total_reviews"), lambda v: _s_to_float(v, 0.0), np.float64)
+    denom = _s_map_unique(col("exposed"), lambda v: _s_to_float(v, 0.0), np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        derived = np.where(denom > 0, total / np.where(denom > 0, denom, 1.0), 0.0)
+    return pd.DataFrame({
+        "키워드": pd.Series(keywords, dtype=object),
+        "brand_ok": _s_map_unique(col("brand"), _s_is_brand_x, bool) if "brand" in raw else np.ones(n, bool),
+        "shopping_ok": _s_map_unique(col("shopping"), _s_is_shopping_o, bool) if "shopping" in raw else np.ones(n, bool),
+        "price": _s_map_unique(col("price"), lambda v: _s_to_int(v, 0), np.int64),
+        "avg_reviews": np.where(avg_given, _s_map_unique(col("avg_reviews"), lambda v: _s_to_float(v, 0.0), np.float64), derived),
+        "season_state": _s_map_unique(col("season"), _s_season_state, np.int8),
+        "month_mask": _s_map_unique(col("season_months"), lambda v: _s_month_bits(_s_extract_months(v)), np.uint16),
+        "ly_total": _s_map_unique(col("ly_total"), lambda v: _s_to_int(v, 0), np.int64),
+        "ly_max_month": _s_map_unique(col("ly_max_month"), lambda v: _s_to_int(v, 0), np.int64),
+        "ly_max_month_volume": _s_map_unique(col("ly_max_month_volume"), lambda v: _s_to_int(v, 0), np.int64),
+    }, columns=S_TABLE_COLS)
+
+
+def _s_iter_raw_parts(
+    src: str | BinaryIO,
+    sheet_name: str | None = None,
+    workers: int = 0,
+    batch_rows: int = S_STREAM_BATCH,
+) -> Iterator[Tuple[int | None, Dict[str, list]]]:
+    """
+    시트 데이터 행을 배치 단위 원본 셀 값({S_SCHEMA_FIELDS 이름: 리스트})으로 읽는다.
+    컬럼 맵은 _s_resolve_columns(헤더 프로필), 맵에 있는 컬럼만 읽는다.
+    workers > 0 이면 xlsx_parallel(블록 단위), 0이면 openpyxl(batch_rows 단위).
+    yield: (시트 데이터 행 수 추정 또는 None, 배치)
+    """
+    pick = _s_resolve_columns
+    if workers > 0:
+        names = xlsx_parallel.sheet_names(src)
+        sheet = sheet_name or ("all" if "all" in names else names[0])
+        yield from xlsx_parallel.iter_sheet_columns(src, sheet, pick, workers=workers)
+        return
+
+    wb = openpyxl.load_workbook(src, read_only=True, data_only=True)
+    try:
+        sheet = sheet_name or _s_pick_sheet(wb)
+        if sheet not in wb.sheetnames:
+            raise ValueError(f"Sheet not found: {sheet}, available={wb.sheetnames}")
+        ws = wb[sheet]
+        total = ws.max_row - 1 if ws.max_row else None
+        header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        idx = pick(header)
+        part: Dict[str, list] = {k: [] for k in idx}
+        # 해석된 컬럼 중 가장 오른쪽까지만 읽는다
+        for row in ws.iter_rows(min_row=2, max_col=max(idx.values()) + 1, values_only=True):
+            n = len(row)
+            for k, i in idx.items():
+                part[k].append(row[i] if i < n else None)
+            if len(part["키워드"]) >= batch_rows:
+                yield total, part
+                part = {k: [] for k in idx}
+        if part["키워드"]:
+            yield total, part
+    finally:
+        wb.close()
+
+
+def _s_src_size(src: str | BinaryIO) -> int:
+    """파일 경로 또는 파일 객체(업로드 버퍼 등)의 바이트 크기."""
+    if isinstance(src, (str, os.PathLike)):
+        return os.path.getsize(src)
+    pos = src.tell()
+    size = src.seek(0, io.SEEK_END)
+    src.seek(pos)
+    return size
+
+
+def _s_iter_ingest(
+    xlsx_path: str | BinaryIO,
+    sheet_name: str | None = None,
+    workers: int | None = None,
+    batch_rows: int = S_STREAM_BATCH,
+) -> Iterator[Tuple[int, int | None, pd.DataFrame]]:
+    """
+    시트를 배치 단위로 읽어 타입 지정 테이블 조각을 순서대로 내보낸다.
+    - 키워드 첫 등장 행만 유지(배치를 넘어 seen 유지)
+    - workers 미지정: S_PARALLEL_MIN_BYTES 이상 파일은 병렬 XML 리더(최대 S_PARALLEL_MAX_WORKERS개,
+      다른 병렬 적재가 진행 중이면 openpyxl), 그 외 openpyxl
+    yield: (지금까지 읽은 행 수, 시트 데이터 행 수 추정 또는 None, 이번 배치 테이블 조각)
+    """
+    slot = False
+    if workers is None:
+        workers = 0
+        if _s_src_size(xlsx_path) >= S_PARALLEL_MIN_BYTES:
+            slot = _S_PARALLEL_SLOT.acquire(blocking=False)
+            workers = min(os.cpu_count() or 1, S_PARALLEL_MAX_WORKERS) if slot else 0
+    try:
+        seen = set()
+        scanned = 0
+        for total, part in _s_iter_raw_parts(xlsx_path, sheet_name, workers, batch_rows):
+            keywords = _s_map_unique(part.pop("키워드", []), _s_norm, object)
+            scanned += len(keywords)
+            keep = np.zeros(len(keywords), dtype=bool)
+            for i, kw in enumerate(keywords):
+                if kw and kw not in seen:
+                    seen.add(kw)
+                    keep[i] = True
+            pos = np.flatnonzero(keep)
+            raw = {k: np.array(v, dtype=object)[pos] for k, v in part.items()}
+            yield scanned, total, _s_table_from_raw(keywords[pos].tolist(), raw)
+    finally:
+        if slot:
+            _S_PARALLEL_SLOT.release()
+
+
+def _s_ingest_xlsx(xlsx_path: str | BinaryIO, sheet_name: str | None = None, workers: int | None = None) -> pd.DataFrame:
+    """
+    시트를 한 번 읽어 필터에 필요한 값만 타입 지정 컬럼 테이블로 변환.
+    - 키워드 첫 등장 행만 유지(parse_sourcing_xlsx_stream의 seen과 같은 규칙)
+    - 브랜드/쇼핑성은 통과 여부(bool, 컬럼 없으면 True), 가격/리뷰/검색량은 숫자
+    """
+    chunks = [chunk for _, _, chunk in _s_iter_ingest(xlsx_path, sheet_name, workers)]
+    if not chunks:
+        return _s_table_from_raw([], {})
+    return pd.concat(chunks, ignore_index=True)
+
+
+def _s_table_path(content: bytes | memoryview, sheet_name: str | None, cache_dir: str | Path = SOURCING_CACHE_DIR) -> Path:
+    """파일 내용 + 스키마 오버라이드 파일 내용의 해시(오버라이드를 고치면 다시 적재)."""
+    h = hashlib.sha256(content)
+    if os.path.exists(S_SCHEMA_OVERRIDE_PATH):
+        with open(S_SCHEMA_OVERRIDE_PATH, "rb") as f:
+            h.update(f.read())
+    digest = h.hexdigest()[:24]
+    return Path(cache_dir) / f"{digest}-{sheet_name or '_'}.parquet"
+
+
+def _s_evict_cache(cache_dir: str | Path, max_bytes: int = S_CACHE_MAX_BYTES, keep: Iterable[Path] = ()) -> None:
+    """
+    캐시 디렉터리 정리(파일 이름이 내용 해시라 지워도 다음 업로드 때 다시 만들어진다).
+    - parquet/csv 총량이 max_bytes를 넘으면 마지막 사용(mtime)이 오래된 것부터 삭제, keep은 보존
+    - S_CACHE_STALE_SECONDS 지난 .part/.tmp(중단된 쓰기)는 삭제
+    """
+    keep = {Path(p) for p in keep}
+    now = datetime.datetime.now().timestamp()
+    files = []
+    for p in Path(cache_dir).glob("*"):
+        try:
+            st_ = p.stat()
+        except FileNotFoundError:
+            continue
+        if p.suffix in (".part", ".tmp"):
+            if now - st_.st_mtime > S_CACHE_STALE_SECONDS:
+                p.unlink(missing_ok=True)
+        elif p.suffix in (".parquet", ".csv"):
+            files.append((st_.st_mtime, st_.st_size, p))
+    total = sum(size for _, size, _ in files)
+    for _, size, p in sorted(files, key=lambda x: x[0]):
+        if total <= max_bytes:
+            break
+        if p in keep:
+            continue
+        p.unlink(missing_ok=True)
+        total -= size
+
+
+def _s_touch(path: Path) -> None:
+    """캐시 적중 시 mtime 갱신(_s_evict_cache의 최근 사용 기준)."""
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+
+def _s_read_cached_table(path: Path) -> pd.DataFrame | None:
+    if not path.exists():
+        return None
+    table = pd.read_parquet(path)
+    if list(table.columns) != S_TABLE_COLS:
+        return None
+    _s_touch(path)
+    return table
+
+
+def _s_save_table(table: pd.DataFrame, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table.to_parquet(path.with_suffix(".tmp"), index=False)
+    path.with_suffix(".tmp").replace(path)
+    _s_evict_cache(path.parent, keep=[path])
+
+
+def _s_criteria_mask(table: pd.DataFrame, criteria: SourcingCriteria) -> np.ndarray:
+    """
+    SourcingCriteria → 행 불리언 마스크. 적재 시 미리 계산한 플래그/숫자/월 비트마스크만 쓰므로
+    조건이 바뀌어도 문자열 처리 없이 배열 연산 몇 번으로 끝난다.
+    - 월 선택 0개: season_state == 없음
+    - 월 선택 1개 이상: season_state == 있음 AND (month_mask & 선택월 비트) != 0
+    """
+    _s_check_criteria(criteria)
+    price = table["price"].to_numpy()
+    avg_rev = table["avg_reviews"].to_numpy()
+    state = table["season_state"].to_numpy()
+    mask = (
+        table["brand_ok"].to_numpy()
+        & table["shopping_ok"].to_numpy()
+        & (criteria.min_coupang_price <= price) & (price <= criteria.max_coupang_price)
+        & (criteria.min_coupang_avg_reviews <= avg_rev) & (avg_rev <= criteria.max_coupang_avg_reviews)
+    )
+    if criteria.selected_months:
+        sel = np.uint16(_s_month_bits(criteria.selected_months))
+        mask &= (state == S_SEASON_HAS) & ((table["month_mask"].to_numpy() & sel) != 0)
+    else:
+        mask &= state == S_SEASON_NONE
+    return mask
+
+
+def _s_filter_table(table: pd.DataFrame, criteria: SourcingCriteria) -> pd.DataFrame:
+    """SourcingCriteria를 컬럼 마스크로 적용(parse_sourcing_xlsx_stream과 같은 결과·순서)."""
+    out = table[_s_criteria_mask(table, criteria)]
+    bad = ~out["ly_max_month"].between(1, 12)
+    if bad.any():
+        raise ValueError(f"Invalid last-year max month: {int(out.loc[bad, 'ly_max_month'].iloc[0])}")
+    return pd.DataFrame({
+        "키워드": out["키워드"].to_numpy(),
+        "작년 검색량": out["ly_total"].to_numpy(),
+        "작년 최대검색월": out["ly_max_month"].to_numpy(),
+        "작년최대 검색월 검색량": out["ly_max_month_volume"].to_numpy(),
+        "쿠팡 평균가": out["price"].to_numpy(),
+        "쿠팡 평균 리뷰수": [round(float(v), 2) for v in out["avg_reviews"]],
+    })
+
+
+# ---- 소싱: 스트리밍 파서 ----
+@dataclass(frozen=True)
+class SourcingBatch:
+    rows: pd.DataFrame     # 이번 배치에서 조건을 통과한 행(S_RESULT_COLS)
+    scanned: int           # 지금까지 읽은 시트 데이터 행 수
+    matched: int           # 지금까지 통과한 행 수
+    total: int | None      # 시트 데이터 행 수 추정(dimension 기준, 모르면 None)
+
+
+def iter_sourcing_xlsx(
+    xlsx_path: str | BinaryIO,
+    criteria: SourcingCriteria,
+    sheet_name: str | None = None,
+    batch_rows: int = S_STREAM_BATCH,
+) -> Iterator[SourcingBatch]:
+    """
+    XLSX 대용량 스트리밍 파서. 조건 통과 행을 배치로 내보내며 진행 카운터를 함께 준다.
+    - 월 선택 0개: 비시즌(계절성 == '없음')
+    - 월 선택 1개 이상: 시즌(계절성 == '있음' AND 계절성 월에 선택월 포함)
+    """
+    _s_check_criteria(criteria)
+    matched = 0
+    for scanned, total, chunk in _s_iter_ingest(xlsx_path, sheet_name, batch_rows=batch_rows):
+        rows = _s_filter_table(chunk, criteria)
+        matched += len(rows)
+        yield SourcingBatch(rows=rows, scanned=scanned, matched=matched, total=total)
+
+
+def parse_sourcing_xlsx_stream(xlsx_path: str | BinaryIO, criteria: SourcingCriteria, sheet_name: str | None = None):
+    """iter_sourcing_xlsx 결과 전체를 dict 리스트로(기존 호출부 호환)."""
+    _s_check_criteria(criteria)
+    results = []
+    for batch in iter_sourcing_xlsx(xlsx_path, criteria, sheet_name):
+        results.extend(batch.rows.to_dict("records"))
+    return results
+
+
+# ---- 소싱: 조건 스윕 ----
+# season 코드: 0..4095 = 시즌(월 비트마스크), 4096 = 비시즌, 4097 = 판정 불가(어떤 조건도 불통과)
+_S_SWEEP_NONE = 1 << 12
+_S_SWEEP_NA = _S_SWEEP_NONE + 1
+
+
+@dataclass(frozen=True)
+class SourcingScenario:
+    criteria: SourcingCriteria
+    count: int
+    keywords: Tuple[str, ...]   # 조건 통과 키워드(시트 순서)
+
+
+def sourcing_criteria_grid(
+    price_bands: Iterable[Tuple[int, int]],
+    review_bands: Iterable[Tuple[float, float]],
+    month_sets: Iterable[Iterable[int]],
+) -> List[SourcingCriteria]:
+    """가격 구간 × 리뷰 구간 × 월 집합 조합."""
+    return [
+        SourcingCriteria(
+            min_coupang_price=int(p[0]), max_coupang_price=int(p[1]),
+            min_coupang_avg_reviews=float(r[0]), max_coupang_avg_reviews=float(r[1]),
+            selected_months=frozenset(m),
+        )
+        for p, r, m in itertools.product(list(price_bands), list(review_bands), [frozenset(m) for m in month_sets])
+    ]
+
+
+def _s_band_bounds(bands: Iterable[Tuple[float, float]]) -> np.ndarray:
+    """[min, max] 구간들의 경계점(각 min, max 바로 위 값). 경계 사이 버킷 안의 값은 모든 구간에 대해 판정이 같다."""
+    pts = set()
+    for lo, hi in bands:
+        pts.add(float(lo))
+        pts.add(float(np.nextafter(float(hi), np.inf)))
+    return np.array(sorted(pts), dtype=np.float64)
+
+
+def _s_band_range(bounds: np.ndarray, lo: float, hi: float) -> Tuple[int, int]:
+    """lo <= v <= hi 인 값이 속하는 버킷 번호 범위 [a, b] (버킷 = searchsorted(bounds, v, 'right'))."""
+    a = int(np.searchsorted(bounds, float(lo))) + 1
+    b = int(np.searchsorted(bounds, float(np.nextafter(float(hi), np.inf))))
+    return a, b
+
+
+def sweep_sourcing_criteria(table: pd.DataFrame, grid: List[SourcingCriteria]) -> List[SourcingScenario]:
+    """
+    조건 조합 전체를 적재 테이블 한 번 훑어서 판정.
+    - 행마다 (가격 버킷, 리뷰 버킷, season 코드)를 한 번 계산해 같은 값끼리 묶는다
+    - 조건별 판정은 묶음(조합 수 ≪ 행 수) 단위라 비용이 행 수 + 묶음 수 × 조건 수
+    - 통과 키워드는 묶음별로 미리 정렬한 행 위치를 이어 붙여 만든다
+    결과 count/keywords는 _s_criteria_mask와 같다.
+    """
+    for c in grid:
+        _s_check_criteria(c)
+    p_bounds = _s_band_bounds((c.min_coupang_price, c.max_coupang_price) for c in grid)
+    r_bounds = _s_band_bounds((c.min_coupang_avg_reviews, c.max_coupang_avg_reviews) for c in grid)
+
+    ok = np.flatnonzero(table["brand_ok"].to_numpy() & table["shopping_ok"].to_numpy())
+    pb = np.searchsorted(p_bounds, table["price"].to_numpy()[ok].astype(np.float64), side="right")
+    rb = np.searchsorted(r_bounds, table["avg_reviews"].to_numpy()[ok], side="right")
+    state = table["season_state"].to_numpy()[ok]
+    sc = np.where(
+        state == S_SEASON_HAS, table["month_mask"].to_numpy()[ok].astype(np.int64),
+        np.where(state == S_SEASON_NONE, _S_SWEEP_NONE, _S_SWEEP_NA),
+    )
+    n_r = len(r_bounds) + 1
+    key = (pb.astype(np.int64) * n_r + rb) * (_S_SWEEP_NA + 1) + sc
+    groups, inverse, sizes = np.unique(key, return_inverse=True, return_counts=True)
+    g_sc = groups % (_S_SWEEP_NA + 1)
+    g_rb = (groups // (_S_SWEEP_NA + 1)) % n_r
+    g_pb = groups // ((_S_SWEEP_NA + 1) * n_r)
+    # 묶음 번호 순으로 정렬한 행 위치(묶음 안은 시트 순서)
+    order = ok[np.argsort(inverse, kind="stable")]
+    starts = np.concatenate(([0], np.cumsum(sizes)))
+
+    keywords = table["키워드"].to_numpy()
+    out: List[SourcingScenario] = []
+    for c in grid:
+        pa, pz = _s_band_range(p_bounds, c.min_coupang_price, c.max_coupang_price)
+        ra, rz = _s_band_range(r_bounds, c.min_coupang_avg_reviews, c.max_coupang_avg_reviews)
+        hit = (pa <= g_pb) & (g_pb <= pz) & (ra <= g_rb) & (g_rb <= rz)
+        if c.selected_months:
+            hit &= (g_sc < _S_SWEEP_NONE) & ((g_sc & _s_month_bits(c.selected_months)) != 0)
+        else:
+            hit &= g_sc == _S_SWEEP_NONE
+        gi = np.flatnonzero(hit)
+        pos = np.sort(np.concatenate([order[starts[g]:starts[g + 1]] for g in gi])) if len(gi) else np.array([], dtype=np.int64)
+        out.append(SourcingScenario(criteria=c, count=int(sizes[gi].sum()), keywords=tuple(keywords[pos])))
+    return out
+
+
+# ---- 소싱: 기회 점수/순위 ----
+S_SCORE_COL = "기회 점수"
+S_TOP_K = 100
+
+
+@dataclass(frozen=True)
+class SourcingScoreWeights:
+    """
+    기회 점수 = Σ 가중치 × 항(각 항은 결과 행 안에서 0~1로 정규화).
+    - search: 작년 검색량(log1p), peak: 작년최대 검색월 검색량(log1p) — 클수록 +
+    - price: 쿠팡 평균가 — 클수록 +(마진 여지)
+    - reviews: 쿠팡 평균 리뷰수(log1p) — 적을수록 +(경쟁 약함)
+    가중치를 음수로 두면 방향이 반대, 0이면 항을 뺀다.
+    """
+    search: float = 0.35
+    peak: float = 0.25
+    price: float = 0.2
+    reviews: float = 0.2
+
+
+def _s_minmax(x: np.ndarray) -> np.ndarray:
+    lo, hi = (float(x.min()), float(x.max())) if len(x) else (0.0, 0.0)
+    if hi <= lo:
+        return np.zeros(len(x), dtype=np.float64)
+    return (x - lo) / (hi - lo)
+
+
+def score_sourcing_rows(rows: pd.DataFrame, weights: SourcingScoreWeights = SourcingScoreWeights()) -> np.ndarray:
+    """결과 행(S_RESULT_COLS) → 기회 점수 배열(0~가중치 합)."""
+    def col(name):
+        return rows[name].to_numpy(dtype=np.float64)
+
+    terms = (
+        (weights.search, _s_minmax(np.log1p(np.maximum(col("작년 검색량"), 0)))),
+        (weights.peak, _s_minmax(np.log1p(np.maximum(col("작년최대 검색월 검색량"), 0)))),
+        (weights.price, _s_minmax(col("쿠팡 평균가"))),
+        (weights.reviews, 1.0 - _s_minmax(np.log1p(np.maximum(col("쿠팡 평균 리뷰수"), 0)))),
+    )
+    score = np.zeros(len(rows), dtype=np.float64)
+    for w, term in terms:
+        if w:
+            score += w * term
+    return score
+
+
+def top_sourcing_rows(
+    rows: pd.DataFrame,
+    k: int = S_TOP_K,
+    weights: SourcingScoreWeights = SourcingScoreWeights(),
+) -> pd.DataFrame:
+    """
+    기회 점수 상위 k행(점수 내림차순, 동점은 원래 순서 — 안정 정렬 후 앞 k행과 같음).
+    전체 정렬 대신 argpartition으로 k번째 점수만 찾아 상위 k개를 고른 뒤 그 k개만 정렬한다.
+    """
+    score = score_sourcing_rows(rows, weights)
+    n = len(score)
+    k = max(0, min(int(k), n))
+    if k == 0:
+        top = np.array([], dtype=np.int64)
+    elif k < n:
+        # k번째 점수 경계의 동점은 앞쪽 행부터 채워 결과를 결정적으로
+        kth = score[np.argpartition(-score, k - 1)[k - 1]]
+        above = np.flatnonzero(score > kth)
+        top = np.concatenate((above, np.flatnonzero(score == kth)[:k - len(above)]))
+    else:
+        top = np.arange(n)
+    top = top[np.lexsort((top, -score[top]))]
+    out = rows.iloc[top].reset_index(drop=True)
+    out.insert(0, S_SCORE_COL, np.round(score[top], 4))
+    return out
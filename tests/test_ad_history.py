@@ -0,0 +1,74 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from ad_analysis_tab import HIST_KEY_COLS, HIST_METRIC_COLS, _history_ingest, _history_load
+
+D1, D2, D3 = (datetime.date(2026, 3, d) for d in (1, 2, 3))
+
+
+def _report(rows) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=["date", "product", "keyword", "surface"] + HIST_METRIC_COLS)
+    for c in ("product", "keyword", "surface"):
+        df[c] = df[c].astype("category")
+    return df
+
+
+def _totals(df: pd.DataFrame) -> pd.Series:
+    return df[HIST_METRIC_COLS].sum()
+
+
+def test_rows_with_same_key_in_one_report_are_summed(tmp_path):
+    # 같은 날짜·상품에 캠페인/옵션별 행, 비검색 지면의 '-' 키워드 행이 여러 개
+    df = _report([
+        (D1, "A", "-", "비검색 영역", 100, 5, 500, 1, 10000),
+        (D1, "A", "-", "비검색 영역", 200, 7, 700, 2, 30000),
+        (D1, "A", "캠핑의자", "검색 영역", 50, 3, 300, 1, 9000),
+        (D1, "A", "캠핑의자", "검색 영역", 40, 2, 200, 0, 0),
+        (D2, "B", "-", "비검색 영역", 10, 1, 100, 1, 5000),
+    ])
+    assert _history_ingest(df, b"r1", "r1.xlsx", root=tmp_path) == 3
+    out = _history_load(D1, D3, root=tmp_path)
+    pd.testing.assert_series_equal(_totals(out), _totals(df), check_dtype=False)
+    row = out[(out["keyword"] == "-") & (out["product"] == "A")]
+    assert row[["impressions", "orders_14d", "revenue_14d"]].values.tolist() == [[300, 3, 40000]]
+
+
+def test_newest_ingest_replaces_the_dates_it_covers(tmp_path):
+    old = _report([
+        (D1, "A", "x", "검색 영역", 1, 1, 100, 1, 1000),
+        (D1, "A", "y", "검색 영역", 1, 1, 100, 1, 1000),
+        (D2, "A", "x", "검색 영역", 1, 1, 100, 1, 1000),
+        (D2, "B", "x", "검색 영역", 1, 1, 100, 1, 1000),
+    ])
+    # 다시 받은 리포트: D2·상품 A만 포함, 키워드 y는 더 이상 없음
+    new = _report([
+        (D2, "A", "x", "검색 영역", 5, 5, 500, 5, 5000),
+        (D2, "A", "x", "검색 영역", 5, 5, 500, 5, 5000),
+    ])
+    _history_ingest(old, b"old", "old.xlsx", root=tmp_path)
+    _history_ingest(new, b"new", "new.xlsx", root=tmp_path)
+    out = _history_load(D1, D3, root=tmp_path).sort_values(HIST_KEY_COLS).reset_index(drop=True)
+    got = {(r.date, r.product, r.keyword): r.cost for r in out.itertuples()}
+    assert got == {(D1, "A", "x"): 100, (D1, "A", "y"): 100, (D2, "A", "x"): 1000, (D2, "B", "x"): 100}
+
+
+def test_large_report_totals_survive_round_trip(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 20_000
+    df = _report({
+        "date": rng.choice([D1, D2, D3], n),
+        "product": rng.choice(["A", "B", "C"], n),
+        "keyword": np.where(rng.random(n) < 0.5, "-", rng.choice([f"k{i}" for i in range(300)], n)),
+        "surface": rng.choice(["검색 영역", "비검색 영역"], n),
+        "impressions": rng.integers(0, 1000, n),
+        "clicks": rng.integers(0, 50, n),
+        "cost": rng.integers(0, 5000, n),
+        "orders_14d": rng.integers(0, 3, n),
+        "revenue_14d": rng.integers(0, 100000, n),
+    })
+    _history_ingest(df, b"big", "big.xlsx", root=tmp_path)
+    out = _history_load(D1, D3, root=tmp_path)
+    pd.testing.assert_series_equal(_totals(out), _totals(df), check_dtype=False)
+    assert not out.duplicated(HIST_KEY_COLS).any()
@@ -0,0 +1,82 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ad_analysis_tab import (
+    EXCL_LABELS, CpcCuts, _aggregate_kw, _aov_p50, _bootstrap_exclusions, _bootstrap_samples,
+    _compute_exclusions, _iter_boot_sums,
+)
+
+
+def _df(n_kw: int = 300, n_days: int = 20, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    kw_code = np.repeat(np.arange(n_kw), rng.integers(1, n_days, n_kw))
+    n = kw_code.size
+    d0 = datetime.date(2026, 1, 1)
+    clicks = rng.integers(0, 6, n)
+    orders = np.where(kw_code % 3 == 0, 0, rng.integers(0, 2, n) * (rng.random(n) < 0.3))
+    return pd.DataFrame({
+        "date": [d0 + datetime.timedelta(days=int(d)) for d in rng.integers(0, n_days, n)],
+        "product": "P",
+        "keyword": [f"k{i}" for i in kw_code],
+        "surface": "검색 영역",
+        "impressions": clicks * 10,
+        "clicks": clicks,
+        "cost": clicks * rng.integers(100, 1500, n),
+        "orders_14d": orders,
+        "revenue_14d": orders * rng.integers(5_000, 40_000, n),
+    })
+
+
+def _hits_oracle(df, kw, cuts, be, n_boot, seed):
+    """재표본마다 원래 정의(컷·손익 ROAS 직접 비교, float64)로 제외 조건 만족 횟수를 센다."""
+    zero = kw["orders_14d"].to_numpy() == 0
+    conv = (kw["orders_14d"].to_numpy() > 0) & kw["cpc"].notna().to_numpy()
+    rows = np.flatnonzero(zero | (kw["roas_14d"].to_numpy() > 0) | conv)
+    p50 = kw.attrs["cpc_global_p50"]
+    hits = {k: np.zeros(len(kw)) for k in EXCL_LABELS}
+    for bs in _iter_boot_sums(df, kw, rows, n_boot, seed):
+        clicks, cost, orders, rev = bs["clicks"], bs["cost"], bs["orders"], bs["rev"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cpc = np.where(clicks > 0, cost / clicks, 0.0)
+            roas = np.where(cost > 0, rev / cost * 100, 0.0)
+            aov_kw = np.where(conv[rows][:, None] & (orders > 0), rev / orders, np.nan)
+            aov = np.nan_to_num(np.nanmedian(aov_kw, axis=0))
+            nxt = np.where(cpc > 0, cpc, p50)
+            r1 = np.where((aov[None, :] > 0) & (cost + nxt > 0), aov[None, :] / (cost + nxt) * 100, 0.0)
+        z = orders == 0
+        hits["a"][rows] += (z & (cpc >= cuts.top)).sum(axis=1)
+        hits["b"][rows] += (z & (cpc <= cuts.bottom) & (clicks >= 1)).sum(axis=1)
+        hits["c"][rows] += (z & (r1 <= be)).sum(axis=1)
+        hits["d"][rows] += ((roas > 0) & (roas < be)).sum(axis=1)
+    return hits
+
+
+@pytest.mark.parametrize("cuts,be", [
+    (CpcCuts(310.7, 1100.3), 250.0), (CpcCuts(0.0, 0.0), 480.5), (CpcCuts(555.5, 777.7), 0.0),
+])
+def test_cached_samples_match_direct_resampling(cuts, be):
+    df = _df()
+    kw, _ = _aggregate_kw(df)
+    masks = _compute_exclusions(kw, cuts, _aov_p50(kw[kw["orders_14d"] > 0]), be)
+    samples = _bootstrap_samples(df, kw, n_boot=60, seed=7)
+    got = _bootstrap_exclusions(samples, kw, cuts, be, masks)
+    hits = _hits_oracle(df, kw, cuts, be, 60, 7)
+    assert sum(int(m.sum()) for m in masks.values()) > 0
+    for k in EXCL_LABELS:
+        np.testing.assert_array_equal(got[k], np.where(masks[k], (hits[k] / 60).round(3), np.nan))
+
+
+def test_cut_change_reuses_samples():
+    df = _df(seed=1)
+    kw, _ = _aggregate_kw(df)
+    aov = _aov_p50(kw[kw["orders_14d"] > 0])
+    samples = _bootstrap_samples(df, kw, n_boot=40, seed=3)
+    for cuts, be in [(CpcCuts(200.0, 900.0), 200.0), (CpcCuts(400.0, 600.0), 350.0)]:
+        masks = _compute_exclusions(kw, cuts, aov, be)
+        out = _bootstrap_exclusions(samples, kw, cuts, be, masks)
+        for k in EXCL_LABELS:
+            assert np.isnan(out[k][~masks[k]]).all()
+            assert ((out[k][masks[k]] >= 0) & (out[k][masks[k]] <= 1)).all()
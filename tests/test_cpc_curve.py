@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import ad_analysis_tab
+from ad_analysis_tab import CURVE_WEBGL_THRESHOLD, SURF_SEARCH_VALUE, CpcCuts, _plot_cpc_curve_plotly_manual
+
+
+@pytest.fixture
+def charts(monkeypatch):
+    """세션 캐시를 dict로 대신하고 st.plotly_chart에 넘어간 Figure를 기록."""
+    figs = []
+    monkeypatch.setattr(ad_analysis_tab.st, "session_state", {})
+    monkeypatch.setattr(ad_analysis_tab.st, "plotly_chart", lambda fig, **k: figs.append(fig))
+    return figs
+
+
+def _kw(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "cpc": rng.uniform(50, 3000, n).round(1),
+        "orders_14d": 1,
+        "revenue_14d": rng.uniform(1_000, 50_000, n),
+        "surface": SURF_SEARCH_VALUE,
+    })
+
+
+def _neighbors(kw: pd.DataFrame, cut: float) -> np.ndarray:
+    x = np.sort(kw["cpc"].to_numpy(float))
+    pos = int(np.searchsorted(x, cut, side="right"))
+    return x[[pos - 1, pos]]
+
+
+def test_cut_neighbors_follow_moved_cut(charts):
+    kw = _kw(CURVE_WEBGL_THRESHOLD * 4)
+    _plot_cpc_curve_plotly_manual(kw, CpcCuts(300.0, 2500.0))
+    _plot_cpc_curve_plotly_manual(kw, CpcCuts(1234.5, 1777.7))
+
+    first, second = charts
+    assert first is second  # 같은 데이터면 캐시된 Figure 재사용
+    xs = np.asarray(second.data[0].x)
+    for cut in (1234.5, 1777.7):
+        assert np.isin(_neighbors(kw, cut), xs).all()
+    assert np.all(np.diff(xs) >= 0)
+    assert [s.x0 for s in second.layout.shapes] == [1234.5, 1777.7]
+
+
+def test_small_curve_keeps_all_points(charts):
+    kw = _kw(500)
+    _plot_cpc_curve_plotly_manual(kw, CpcCuts(300.0, 2500.0))
+    assert len(charts[0].data[0].x) == 500
@@ -0,0 +1,51 @@
+import io
+import zipfile
+
+import openpyxl
+import pandas as pd
+
+from ad_analysis_tab import (
+    SURF_SEARCH_VALUE, CpcCuts, _add_kw_ratios, _compute_exclusions, _dedup_exclusion_keywords,
+    _scenario_grid, _simulate_scenarios, _write_exclusion_bundle,
+)
+
+
+def _kw() -> pd.DataFrame:
+    kw = pd.DataFrame([
+        # keyword, surface, clicks, cost, orders, revenue
+        ("-", "리타겟팅", 40, 90_000, 0, 0),
+        ("-", SURF_SEARCH_VALUE, 5, 20_000, 0, 0),
+        ("캠핑의자", "리타겟팅", 10, 30_000, 0, 0),
+        ("캠핑의자", SURF_SEARCH_VALUE, 10, 30_000, 0, 0),
+        ("접이식의자", SURF_SEARCH_VALUE, 10, 1_000, 0, 0),
+        ("체어", SURF_SEARCH_VALUE, 10, 10_000, 2, 50_000),
+    ], columns=["keyword", "surface", "clicks", "cost", "orders_14d", "revenue_14d"])
+    kw["impressions"] = kw["clicks"] * 20
+    return _add_kw_ratios(kw)
+
+
+def test_bundle_has_only_search_keywords():
+    kw = _kw()
+    masks = _compute_exclusions(kw, CpcCuts(bottom=150.0, top=2000.0), 25_000.0, 300.0)
+    assert masks["a"][0]  # '-' 비검색 행도 조건 자체는 만족
+    sets = _dedup_exclusion_keywords(kw, masks)
+    assert sets["a"].tolist() == ["캠핑의자"]
+    assert sets["b"].tolist() == ["접이식의자"]
+
+    with zipfile.ZipFile(io.BytesIO(_write_exclusion_bundle([("상품", sets)]))) as zf:
+        words = [w for key in "abcd" for w in zf.read(f"상품/{key}.txt").decode("utf-8").split()]
+        ws = openpyxl.load_workbook(io.BytesIO(zf.read("exclusions.xlsx"))).active
+        xlsx_words = [r[2] for r in ws.iter_rows(min_row=2, values_only=True)]
+    assert "-" not in words and "-" not in xlsx_words
+    assert sorted(words) == sorted(xlsx_words)
+
+
+def test_exclusion_scenarios_leave_non_search_alone():
+    kw = _kw()
+    masks = _compute_exclusions(kw, CpcCuts(bottom=150.0, top=2000.0), 25_000.0, 300.0)
+    sim = _simulate_scenarios(kw, masks, _scenario_grid((0.0, 20.0))).set_index(["시나리오", "영역"])
+    non_search = int(kw.loc[kw["surface"] != SURF_SEARCH_VALUE, "cost"].sum())
+    assert (sim.xs("비검색", level="영역")["광고비"] == non_search).all()
+    # a 제외: 검색 영역의 캠핑의자(30,000원)만 빠지고, 검색 영역 '-' 행은 남는다
+    search = int(kw.loc[kw["surface"] == SURF_SEARCH_VALUE, "cost"].sum())
+    assert sim.loc[("a 제외", "검색"), "광고비"] == search - 30_000
@@ -0,0 +1,40 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from ad_analysis_tab import _keyword_trends
+
+
+def _frame(n_kw: int, n_days: int, active_days: int, seed: int) -> pd.DataFrame:
+    """_normalize 출력과 같은 컬럼 구성(키워드별 활성 일자를 무작위로 고른 행, 같은 날 중복 행 포함)."""
+    rng = np.random.default_rng(seed)
+    kw_code = np.repeat(np.arange(n_kw), rng.poisson(active_days, n_kw).clip(1, n_days))
+    n = kw_code.size
+    d0 = datetime.date(2026, 1, 1)
+    clicks = rng.integers(0, 30, n).astype(np.int32)
+    return pd.DataFrame({
+        "date": [d0 + datetime.timedelta(days=int(d)) for d in rng.integers(0, n_days, n)],
+        "product": pd.Categorical(["P"] * n),
+        "keyword": pd.Categorical.from_codes(kw_code, [f"키워드{i}" for i in range(n_kw)]),
+        "surface": pd.Categorical(["검색 영역"] * n),
+        "impressions": (clicks * 10).astype(np.int32),
+        "clicks": clicks,
+        "cost": clicks.astype(np.int64) * rng.integers(100, 2000, n),
+        "orders_14d": rng.integers(0, 3, n).astype(np.int32),
+        "revenue_14d": rng.integers(0, 80_000, n).astype(np.int64),
+    })
+
+
+def test_rolling_sums_match_naive_window():
+    df = _frame(n_kw=40, n_days=35, active_days=8, seed=3)
+    trends = _keyword_trends(df, windows=(7, 28))
+    daily = df.groupby(["keyword", "date"], observed=True)[["clicks", "cost", "revenue_14d"]].sum()
+    for row in trends.sample(200, random_state=0).itertuples():
+        for w in (7, 28):
+            lo = row.date - datetime.timedelta(days=w - 1)
+            g = daily.loc[row.keyword]
+            win = g[(g.index >= lo) & (g.index <= row.date)].sum()
+            assert getattr(row, f"spend_{w}d") == win["cost"]
+            exp_cpc = round(win["cost"] / win["clicks"], 2) if win["clicks"] else 0.0
+            assert np.isclose(getattr(row, f"cpc_{w}d"), exp_cpc)
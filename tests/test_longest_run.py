@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from ad_analysis_tab import _longest_true_run_by_x
+
+
+def _longest_true_run_by_x_loop(mask, x):
+    """벡터화 이전 반복문 구현(테스트 기준값)."""
+    best_span, best_s, cur_s = 0.0, -1, -1
+    for i, v in enumerate(mask):
+        if v and cur_s == -1:
+            cur_s = i
+        if (not v or i == len(mask) - 1) and cur_s != -1:
+            e = i if not v else i
+            span = float(x[e] - x[cur_s])
+            if span > best_span:
+                best_span, best_s = span, cur_s
+            cur_s = -1
+    if best_s == -1:
+        return -1, -1
+    e = best_s
+    while e + 1 < len(mask) and mask[e + 1]:
+        e += 1
+    return best_s, e
+
+
+def _cases(seed: int):
+    rng = np.random.default_rng(seed)
+    for _ in range(400):
+        n = int(rng.integers(0, 60))
+        mask = rng.random(n) < rng.uniform(0.0, 1.0)
+        kind = rng.integers(0, 4)
+        if kind == 0:    # 정렬된 x(누적곡선과 같은 형태)
+            x = np.sort(rng.uniform(0, 5000, n))
+        elif kind == 1:  # 정수 x: 폭 동률이 자주 생김
+            x = np.sort(rng.integers(0, 8, n)).astype(float)
+        elif kind == 2:  # 정렬 안 된 x: 음수 폭
+            x = rng.normal(0, 100, n)
+        else:            # NaN 섞인 x
+            x = np.sort(rng.uniform(0, 100, n))
+            x[rng.random(n) < 0.2] = np.nan
+        yield mask, x
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_matches_loop_version(seed):
+    for mask, x in _cases(seed):
+        assert _longest_true_run_by_x(mask, x) == _longest_true_run_by_x_loop(mask, x), (mask.tolist(), x.tolist())
+
+
+@pytest.mark.parametrize("mask", [[], [True], [False], [True] * 5, [False] * 5])
+def test_edge_masks(mask):
+    x = np.arange(len(mask), dtype=float)
+    assert _longest_true_run_by_x(np.array(mask, dtype=bool), x) == _longest_true_run_by_x_loop(mask, x)
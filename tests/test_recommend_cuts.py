@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ad_analysis_tab import SURF_SEARCH_VALUE, _add_kw_ratios, _recommend_cuts
+
+
+def _kw(n: int, roas_pct: float, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    clicks = rng.integers(1, 200, n)
+    cost = clicks * rng.integers(50, 3000, n)
+    orders = rng.integers(0, 5, n)
+    # 키워드별 ROAS를 roas_pct 주변으로 흩뿌림(주문 0이면 매출 0)
+    revenue = np.where(orders > 0, cost * roas_pct / 100 * rng.uniform(0.2, 1.8, n), 0).astype(np.int64)
+    kw = pd.DataFrame({
+        "keyword": [f"k{i}" for i in range(n)],
+        "surface": SURF_SEARCH_VALUE,
+        "impressions": clicks * 20,
+        "clicks": clicks,
+        "cost": cost,
+        "orders_14d": orders,
+        "revenue_14d": revenue,
+    })
+    return _add_kw_ratios(kw)
+
+
+def _profit_delta(kw: pd.DataFrame, bottom: float, top: float, margin: float) -> float:
+    """컷 밖 키워드를 끌 때의 이익 변화(원) = 절감 광고비 - 손실 매출 × 이익률."""
+    base = kw[(kw["surface"] == SURF_SEARCH_VALUE) & (kw["clicks"] > 0)]
+    off = (base["cpc"] <= bottom) | (base["cpc"] >= top)
+    return float(base.loc[off, "cost"].sum()) - margin * float(base.loc[off, "revenue_14d"].sum())
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("breakeven_roas", [0.0, 150.0, 300.0, 500.0])
+def test_recommendation_never_lowers_profit_at_high_roas(seed, breakeven_roas):
+    kw = _kw(3000, roas_pct=1000.0, seed=seed)
+    best = _recommend_cuts(kw, breakeven_roas=breakeven_roas)["best"]
+    margin = min(1.0, 100.0 / breakeven_roas) if breakeven_roas > 0 else 1.0
+    for row in best.itertuples():
+        assert _profit_delta(kw, row.bottom, row.top, margin) > 0
+
+
+def test_uniform_high_roas_recommends_nothing():
+    kw = _kw(2000, roas_pct=1000.0, seed=0)
+    kw["revenue_14d"] = np.where(kw["orders_14d"] > 0, kw["cost"] * 10, 0)
+    kw = _add_kw_ratios(kw)
+    assert _recommend_cuts(kw, breakeven_roas=300.0)["best"].empty
+
+
+def test_low_roas_tail_is_cut():
+    kw = _kw(2000, roas_pct=1000.0, seed=1)
+    # CPC 상위 구간을 손실 키워드로 만든다
+    hi = kw["cpc"] >= kw["cpc"].quantile(0.9)
+    kw.loc[hi, "revenue_14d"] = np.where(kw.loc[hi, "orders_14d"] > 0, kw.loc[hi, "cost"] // 10, 0)
+    kw = _add_kw_ratios(kw)
+    best = _recommend_cuts(kw, breakeven_roas=300.0)["best"]
+    assert not best.empty
+    assert best.iloc[0]["score"] > 0
+    assert _profit_delta(kw, best.iloc[0]["bottom"], best.iloc[0]["top"], 1 / 3) > 0
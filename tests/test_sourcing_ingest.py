@@ -0,0 +1,99 @@
+import functools
+import io
+
+import openpyxl
+import pandas as pd
+import pytest
+
+import xlsx_parallel
+from sourcing import SourcingCriteria, _s_ingest_xlsx, _s_iter_ingest, iter_sourcing_xlsx, parse_sourcing_xlsx_stream
+
+HEADER = [
+    "키워드", "브랜드 키워드", "쇼핑성 키워드", "쿠팡 평균가", "쿠팡 평균리뷰수", "쿠팡 총리뷰수",
+    "쿠팡 노출상품수", "작년 검색량", "작년 최대 검색 월", "작년 최대 검색 월 검색량", "계절성", "계절성 월",
+]
+
+
+def _xlsx(rows) -> io.BytesIO:
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "all"
+    ws.append(HEADER)
+    for r in rows:
+        ws.append(r)
+    buf = io.BytesIO()
+    wb.save(buf)
+    buf.seek(0)
+    return buf
+
+
+@pytest.fixture(autouse=True)
+def _cwd(tmp_path, monkeypatch):
+    # 헤더 프로필 캐시(sourcing_cache/)를 테스트 폴더에 만든다
+    monkeypatch.chdir(tmp_path)
+
+
+# 빈 셀: 키워드 없음 / 평균리뷰수·총리뷰수 없음 / 가격 없음
+BLANK_ROWS = [
+    [None, None, None, 15000, 200, None, 10, 1000, 3, 300, "없음", None],
+    ["텀블러", "X", "O", 15000, None, None, 10, 1000, 3, 300, "없음", None],
+    ["  ", "X", "O", 15000, 200, None, 10, 1000, 3, 300, "없음", None],
+    ["보온병", "X", "O", None, None, 3000, 10, 1000, 3, 300, "없음", None],
+    [None, None, None, None, None, None, None, None, None, None, None, None],
+]
+
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_blank_cells_stay_blank(workers):
+    table = _s_ingest_xlsx(_xlsx(BLANK_ROWS), workers=workers)
+
+    assert table["키워드"].tolist() == ["텀블러", "보온병"]
+    assert table["avg_reviews"].tolist() == [0.0, 300.0]
+    assert table["price"].tolist() == [15000, 0]
+    assert not table.isna().any().any()
+
+
+def test_process_pool_matches_openpyxl(monkeypatch):
+    # 블록을 작게 잘라 워커 2개가 여러 블록을 나눠 읽게 한다
+    monkeypatch.setattr(
+        xlsx_parallel, "iter_sheet_columns", functools.partial(xlsx_parallel.iter_sheet_columns, block_bytes=4096)
+    )
+    rows = [
+        [f"키워드{i % 1500}", "X", "O", 1000 + i, i % 7 or None, 10 * i, 5, 100 + i, i % 12 + 1, 50, "없음", None]
+        for i in range(3000)
+    ] + BLANK_ROWS
+    buf = _xlsx(rows)
+    expect = _s_ingest_xlsx(buf, workers=0)
+    buf.seek(0)
+    got = _s_ingest_xlsx(buf, workers=2)
+
+    assert len(expect) == 1502
+    pd.testing.assert_frame_equal(got, expect)
+
+
+def test_first_keyword_wins_across_batches():
+    rows = [[f" 키워드{i % 40} ", "X", "O", i, 1, 1, 1, 1, 1, 1, "없음", None] for i in range(200)] + BLANK_ROWS
+    parts = [chunk for _, _, chunk in _s_iter_ingest(_xlsx(rows), "all", workers=0, batch_rows=7)]
+    table = pd.concat(parts, ignore_index=True)
+
+    assert len(parts) > 1
+    assert table["키워드"].tolist() == [f"키워드{i}" for i in range(40)] + ["텀블러", "보온병"]
+    assert table["price"].tolist() == list(range(40)) + [15000, 0]
+
+
+def test_blank_keyword_rows_do_not_match():
+    crit = SourcingCriteria(min_coupang_avg_reviews=0.0)
+    rows = parse_sourcing_xlsx_stream(_xlsx(BLANK_ROWS), crit)
+    assert [r["키워드"] for r in rows] == ["텀블러"]
+    assert rows[0]["쿠팡 평균 리뷰수"] == 0.0
+
+
+def test_invalid_max_month_raises():
+    rows = [["텀블러", "X", "O", 15000, 200, None, 10, 1000, 13, 300, "없음", None]]
+    with pytest.raises(ValueError, match="max month"):
+        list(iter_sourcing_xlsx(_xlsx(rows), SourcingCriteria()))
+
+
+def test_invalid_months_fail_before_reading():
+    with pytest.raises(ValueError, match="selected_months"):
+        next(iter_sourcing_xlsx(io.BytesIO(b"not a workbook"), SourcingCriteria(selected_months=frozenset({13}))))
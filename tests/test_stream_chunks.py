@@ -0,0 +1,66 @@
+import io
+
+import openpyxl
+import pytest
+
+import ad_analysis_tab
+from ad_analysis_tab import REQUIRED_COLS, _iter_raw_chunks
+
+
+class _Upload(io.BytesIO):
+    name = "report.xlsx"
+
+
+def _xlsx(header, rows) -> _Upload:
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(header)
+    for r in rows:
+        ws.append(r)
+    buf = _Upload()
+    wb.save(buf)
+    return _Upload(buf.getvalue())
+
+
+@pytest.fixture
+def closed(monkeypatch):
+    """_iter_raw_chunks가 연 워크북의 close 호출 여부를 기록."""
+    calls = []
+    real = openpyxl.load_workbook
+
+    def load(*a, **k):
+        wb = real(*a, **k)
+        orig_close = wb.close
+
+        def close():
+            calls.append(True)
+            orig_close()
+
+        wb.close = close
+        return wb
+
+    monkeypatch.setattr(ad_analysis_tab.openpyxl, "load_workbook", load)
+    return calls
+
+
+def test_workbook_closed_when_header_invalid(closed):
+    up = _xlsx(["날짜", "키워드"], [["2026-03-01", "a"]])
+    with pytest.raises(ValueError, match="필수 컬럼 누락"):
+        list(_iter_raw_chunks(up))
+    assert closed == [True]
+
+
+def test_workbook_closed_when_consumer_stops_early(closed):
+    rows = [["2026-03-01", "a", "검색 영역", 1, 1, 100, 0, 0]] * 10
+    up = _xlsx(REQUIRED_COLS, rows)
+    chunks = _iter_raw_chunks(up, chunksize=3)
+    assert len(next(chunks)) == 3
+    chunks.close()
+    assert closed == [True]
+
+
+def test_all_rows_read_and_closed(closed):
+    rows = [["2026-03-01", f"k{i}", "검색 영역", 1, 1, 100, 0, 0] for i in range(7)]
+    up = _xlsx(REQUIRED_COLS, rows)
+    assert sum(len(c) for c in _iter_raw_chunks(up, chunksize=3)) == 7
+    assert closed == [True]
@@ -0,0 +1,257 @@
+# app/xlsx_parallel.py
+from __future__ import annotations
+
+import itertools
+import multiprocessing
+import os
+import posixpath
+import re
+import xml.etree.ElementTree as ET
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, BinaryIO, Callable, Deque, Dict, Iterator, List, Tuple
+
+# ===================== 설정/상수 =====================
+_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_ROW_OPEN = b"<row"
+_DIGITS = "0123456789"
+_DIMENSION_RE = re.compile(rb'<dimension[^>]*\sref="[A-Z]*\d*:?[A-Z]*(\d+)"')
+
+# 워커 한 번에 넘기는 압축 해제 XML 크기
+BLOCK_BYTES = 8 * 1024 * 1024
+# 워커는 forkserver로 시작(스레드가 도는 서버 프로세스를 그대로 fork하지 않게), 없으면 spawn
+_MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+# ===================== 패키지 구조 =====================
+def _resolve_target(base_dir: str, target: str) -> str:
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(base_dir, target))
+
+
+def _workbook_parts(zf: zipfile.ZipFile) -> Tuple[Dict[str, str], str | None]:
+    """시트 이름 → 시트 XML 경로(시트 순서 유지), 공유 문자열 XML 경로."""
+    rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    by_id: Dict[str, str] = {}
+    shared: str | None = None
+    for rel in rels.iter(f"{_PKG_REL_NS}Relationship"):
+        target = _resolve_target("xl", rel.get("Target", ""))
+        by_id[rel.get("Id", "")] = target
+        if rel.get("Type", "").endswith("/sharedStrings"):
+            shared = target
+    wb = ET.fromstring(zf.read("xl/workbook.xml"))
+    sheets = {
+        s.get("name", ""): by_id[s.get(f"{_REL_NS}id", "")]
+        for s in wb.iter(f"{_NS}sheet")
+    }
+    return sheets, shared
+
+
+def sheet_names(src: str | BinaryIO) -> List[str]:
+    with zipfile.ZipFile(src) as zf:
+        return list(_workbook_parts(zf)[0])
+
+
+def _read_shared_strings(zf: zipfile.ZipFile, path: str | None) -> List[str]:
+    """공유 문자열 표(윗주 rPh 제외, 서식 run은 이어 붙임)."""
+    if not path or path not in zf.namelist():
+        return []
+    out: List[str] = []
+    with zf.open(path) as f:
+        for _, el in ET.iterparse(f, events=("end",)):
+            if el.tag != f"{_NS}si":
+                continue
+            parts = [t.text or "" for t in el.findall(f"{_NS}t")]
+            parts += [t.text or "" for t in el.findall(f"{_NS}r/{_NS}t")]
+            out.append("".join(parts))
+            el.clear()
+    return out
+
+# ===================== 셀/행 파싱 =====================
+_COL_CACHE: Dict[str, int] = {}
+
+
+def _col_index(ref: str) -> int:
+    """셀 참조(예: 'AB12') → 0부터 시작하는 열 번호(열 문자열별로 캐시)."""
+    letters = ref.rstrip(_DIGITS)
+    n = _COL_CACHE.get(letters)
+    if n is None:
+        n = 0
+        for ch in letters:
+            n = n * 26 + (ord(ch) - 64)
+        n = _COL_CACHE[letters] = n - 1
+    return n
+
+
+def _cell_value(c: ET.Element, shared: List[str]) -> Any:
+    """openpyxl(read_only, values_only, data_only)와 같은 값 규칙. 날짜 서식 변환은 하지 않음."""
+    t = c.get("t", "n")
+    if t == "inlineStr":
+        is_ = c.find(f"{_NS}is")
+        if is_ is None:
+            return None
+        return "".join(x.text or "" for x in is_.iter(f"{_NS}t"))
+    v = c.find(f"{_NS}v")
+    if v is None or v.text is None:
+        return None
+    text = v.text
+    if t == "s":
+        return shared[int(text)]
+    if t == "b":
+        return bool(int(text))
+    if t in ("str", "e", "d"):
+        return text
+    if "." in text or "E" in text or "e" in text:
+        return float(text)
+    return int(text)
+
+
+def _row_values(row: ET.Element, want: Dict[int, str], shared: List[str], last: int) -> Dict[str, Any]:
+    """요청 컬럼 값만 변환. 셀은 열 순서로 나오므로 last(요청 컬럼 최댓값)를 넘으면 중단."""
+    out: Dict[str, Any] = {}
+    pos = -1
+    for c in row.iter(f"{_NS}c"):
+        ref = c.get("r")
+        pos = _col_index(ref) if ref else pos + 1
+        if pos > last:
+            break
+        name = want.get(pos)
+        if name is not None:
+            out[name] = _cell_value(c, shared)
+    return out
+
+
+_SHARED: List[str] = []
+
+
+def _init_worker(shared: List[str]) -> None:
+    global _SHARED
+    _SHARED = shared
+
+
+def _parse_block(args: Tuple[bytes, bytes, Dict[int, str]]) -> Dict[str, List[Any]]:
+    """행 블록(완전한 <row>들) → 요청 컬럼별 값 리스트. 없는 셀은 None."""
+    root_open, block, want = args
+    sheet_data = ET.fromstring(root_open + b"<sheetData>" + block + b"</sheetData></worksheet>")[0]
+    cols: Dict[str, List[Any]] = {name: [] for name in want.values()}
+    last = max(want, default=-1)
+    for row in sheet_data:
+        vals = _row_values(row, want, _SHARED, last)
+        for name, lst in cols.items():
+            lst.append(vals.get(name))
+    return cols
+
+# ===================== 시트 분할/병렬 읽기 =====================
+def _iter_row_blocks(f: BinaryIO, block_bytes: int) -> Iterator[Tuple[bytes, int | None, bytes]]:
+    """
+    압축 해제 스트림에서 (루트 여는 태그, 시트 행 수, 완전한 <row>들로 끝나는 블록)을 순서대로 꺼낸다.
+    시트 행 수는 <dimension ref="A1:L123">의 마지막 행 번호(없으면 None, openpyxl max_row와 같은 출처).
+    시트 XML 전체를 메모리에 올리지 않고, 블록 경계는 다음 '<row' 직전으로 맞춘다.
+    루트 태그는 네임스페이스 선언(x14ac 등)을 블록 파싱에 그대로 쓰기 위해 보존.
+    sheetData 안에서 '<row'로 시작하는 태그는 행뿐이라 바이트 검색으로 행 경계를 찾는다.
+    """
+    buf = b""
+    while b"<sheetData" not in buf or buf.find(b">", buf.find(b"<sheetData")) < 0:
+        chunk = f.read(block_bytes)
+        if not chunk:
+            return
+        buf += chunk
+    w = buf.index(b"<worksheet")
+    root_open = buf[w:buf.index(b">", w) + 1]
+    sd = buf.index(b"<sheetData")
+    dim = _DIMENSION_RE.search(buf, 0, sd)
+    max_row = int(dim.group(1)) if dim else None
+    sd_end = buf.index(b">", sd)
+    if buf[sd_end - 1:sd_end] == b"/":  # <sheetData/>
+        return
+    buf = buf[sd_end + 1:]
+    done = False
+    while not done:
+        end = buf.find(b"</sheetData>")
+        if end >= 0:
+            done = True
+            block, buf = buf[:end], b""
+        else:
+            chunk = f.read(block_bytes)
+            if chunk and len(buf) < block_bytes:
+                buf += chunk
+                continue
+            if not chunk:
+                raise ValueError("sheetData가 닫히지 않은 시트 XML")
+            cut = buf.rfind(_ROW_OPEN)
+            if cut <= 0:
+                buf += chunk
+                continue
+            block, buf = buf[:cut], buf[cut:] + chunk
+        if block.strip():
+            yield root_open, max_row, block
+
+
+def _row_cells(row: ET.Element, shared: List[str]) -> Tuple[Any, ...]:
+    cells: Dict[int, Any] = {}
+    pos = -1
+    for c in row.iter(f"{_NS}c"):
+        ref = c.get("r")
+        pos = _col_index(ref) if ref else pos + 1
+        cells[pos] = _cell_value(c, shared)
+    return tuple(cells.get(i) for i in range(max(cells) + 1)) if cells else ()
+
+
+def iter_sheet_columns(
+    src: str | BinaryIO,
+    sheet: str,
+    pick: Callable[[Tuple[Any, ...]], Dict[str, int]],
+    workers: int | None = None,
+    block_bytes: int = BLOCK_BYTES,
+) -> Iterator[Tuple[int | None, Dict[str, List[Any]]]]:
+    """
+    xlsx 시트를 행 블록으로 나눠 프로세스 풀에서 파싱하고, 블록 결과를 시트 순서대로 내보낸다.
+    - 공유 문자열 표는 한 번만 읽어 워커 초기화 때 넘김
+    - pick(header) → {이름: 컬럼 인덱스}: 첫 행(헤더)을 보고 읽을 컬럼만 고른다
+    - 동시에 처리 중인 블록은 워커 수 × 2개로 제한(메모리 상한)
+    yield: (시트 데이터 행 수 추정 또는 None, {이름: 이번 블록 값 리스트})
+    """
+    workers = max(1, int(workers or os.cpu_count() or 1))
+    with zipfile.ZipFile(src) as zf:
+        sheets, shared_path = _workbook_parts(zf)
+        if sheet not in sheets:
+            raise ValueError(f"Sheet not found: {sheet}, available={list(sheets)}")
+        shared = _read_shared_strings(zf, shared_path)
+        with zf.open(sheets[sheet]) as f:
+            blocks = _iter_row_blocks(f, block_bytes)
+            first = next(blocks, None)
+            if first is None:
+                pick(())
+                return
+            root_open, max_row, block = first
+
+            # 1행이 없으면 openpyxl처럼 헤더는 빈 행, 첫 <row>부터 데이터
+            header: Tuple[Any, ...] = ()
+            second = block.find(_ROW_OPEN, block.find(_ROW_OPEN) + 1)
+            head = block if second < 0 else block[:second]
+            row = ET.fromstring(root_open + head + b"</worksheet>").find(f"{_NS}row")
+            if row is not None and row.get("r", "1") == "1":
+                header = _row_cells(row, shared)
+                block = b"" if second < 0 else block[second:]
+            want = {i: name for name, i in pick(header).items()}
+            total = max_row - 1 if max_row and header else max_row
+
+            tasks = itertools.chain([(root_open, max_row, block)] if block else [], blocks)
+            if workers == 1:
+                _init_worker(shared)
+                for r, _, b in tasks:
+                    yield total, _parse_block((r, b, want))
+                return
+            with ProcessPoolExecutor(max_workers=workers, mp_context=_MP_CONTEXT, initializer=_init_worker, initargs=(shared,)) as ex:
+                pending: Deque[Future] = deque()
+                for r, _, b in tasks:
+                    pending.append(ex.submit(_parse_block, (r, b, want)))
+                    if len(pending) >= workers * 2:
+                        yield total, pending.popleft().result()
+                while pending:
+                    yield total, pending.popleft().result()